@@ -1,34 +1,79 @@
 import sqlite3
 import os
+from contextlib import contextmanager
 
 class DatabaseManager:
-    def __init__(self, db_name="shot_timer.db"):
+    def __init__(self, db_name="shot_timer.db", cache_size_kb=8192, mmap_size=64 * 1024 * 1024):
+        """
+        :param db_name: Path of the SQLite database file.
+        :param cache_size_kb: Size of the page cache in KiB.
+        :param mmap_size: Number of bytes of the database file to memory-map for reads.
+        """
         self.db_name = db_name
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
         self.connection = None
+        self._transaction_depth = 0
 
     def connect(self):
         """Connect to the SQLite database. Creates the file if it doesn't exist."""
         if not os.path.exists(self.db_name):
             print(f"Database {self.db_name} not found. Creating a new one.")
-        self.connection = sqlite3.connect(self.db_name)
+        # Autocommit mode; transactions are opened explicitly through transaction()
+        self.connection = sqlite3.connect(self.db_name, isolation_level=None)
+        self.configure()
+
+    def configure(self):
+        """Tune the connection for SD-card storage and concurrent readers."""
+        # WAL lets readers continue while another connection writes, and with
+        # synchronous=NORMAL a commit no longer waits for an fsync
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        self.connection.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        self.connection.execute("PRAGMA temp_store=MEMORY")
 
     def close(self):
         """Close the database connection."""
         if self.connection:
             self.connection.close()
 
+    @contextmanager
+    def transaction(self):
+        """
+        Run the enclosed statements in a single transaction.
+
+        Nested uses join the outermost transaction, which commits when it exits
+        normally and rolls back if an exception escapes it.
+        """
+        if self._transaction_depth == 0:
+            # Take the write lock up front so concurrent writers wait instead of deadlocking
+            self.connection.execute("BEGIN IMMEDIATE")
+        self._transaction_depth += 1
+        try:
+            yield self.connection
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.connection.execute("ROLLBACK")
+            raise
+        else:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.connection.execute("COMMIT")
+
+    def execute(self, query, params=None):
+        """Execute a single statement and return its cursor, e.g. to read lastrowid or iterate rows."""
+        return self.connection.execute(query, params or ())
+
     def execute_query(self, query, params=None):
         """Execute a single query."""
-        with self.connection:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params or ())
-            return cursor.fetchall()
+        return self.connection.execute(query, params or ()).fetchall()
 
     def execute_many(self, query, params_list):
         """Execute a query with multiple parameters."""
-        with self.connection:
-            cursor = self.connection.cursor()
-            cursor.executemany(query, params_list)
+        with self.transaction():
+            self.connection.executemany(query, params_list)
 
     def cursor(self):
         return self.connection.cursor()
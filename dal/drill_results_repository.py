@@ -1,198 +1,322 @@
-import json
 from models.drill_results import DrillResults
+from models.drill_results_aggregate import DrillResultsAggregate
+from dal.migrations import apply_migrations
+from dal.split_codec import pack_splits, unpack_splits, register_split_functions
+from dal.result_cache import ResultCache
+from dal.result_aggregates import AGGREGATE_COLUMNS, BUCKET_KINDS, bucket_bound, rebuild_aggregates
+
+# Column order expected by drill_results_row_factory
+DRILL_RESULTS_COLUMNS = (
+    'id, drill_name, start_time, end_time, elapsed_time, shots_fired, splits, '
+    'average_split_time, fastest_split_time, slowest_split_time, score, notes'
+)
+
+def drill_results_row_factory(cursor, row):
+    """sqlite3 row factory mapping a row of DRILL_RESULTS_COLUMNS to DrillResults; splits are unpacked on first access."""
+    return DrillResults(
+        row[1], row[2], row[3], row[4], row[5], row[6],
+        row[7], row[8], row[9], row[10], row[11], row[0],
+        splits_decoder=unpack_splits
+    )
+
+def notes_match_query(text):
+    """
+    Turn free text typed by the user into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so punctuation and FTS5 operators
+    in the text never cause syntax errors and partially typed words still match.
+    Returns None when the text has no words.
+    """
+    terms = ['"' + word.replace('"', '""') + '"*' for word in text.split()]
+    return ' '.join(terms) if terms else None
 
 class DrillResultsRepository:
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, cache=None, event_bus=None):
+        """
+        :param db_manager: Connected DatabaseManager to run queries on.
+        :param cache: ResultCache for query results; share one between repositories on different
+            connections so writes through any of them invalidate the others' reads.
+        :param event_bus: Optional ResultsEventBus told about every committed insert, update and delete.
+        """
         self.db_manager = db_manager
-        self.create_table()
-
-    def create_table(self):
-        create_table_query = '''
-        CREATE TABLE IF NOT EXISTS drill_results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            drill_name TEXT NOT NULL,
-            start_time INTEGER NOT NULL,
-            end_time INTEGER NOT NULL,
-            elapsed_time INTEGER NOT NULL,
-            shots_fired INTEGER NOT NULL,
-            splits TEXT NOT NULL,
-            average_split_time REAL,
-            fastest_split_time REAL,
-            slowest_split_time REAL,
-            score REAL,
-            notes TEXT
-        )
-        '''
-        self.db_manager.execute_query(create_table_query)
+        self.cache = cache if cache is not None else ResultCache()
+        self.event_bus = event_bus
+        apply_migrations(self.db_manager)
+        register_split_functions(self.db_manager.connection)
 
     def upsert(self, drill_results):
-        if drill_results.id is None:
-            # Insert new record
-            insert_query = '''
-            INSERT INTO drill_results (
-                drill_name, start_time, end_time, elapsed_time, shots_fired, splits, 
-                average_split_time, fastest_split_time, slowest_split_time, score, notes
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            '''
-            params = (
-                drill_results.drill_name,
-                drill_results.start_time,
-                drill_results.end_time,
-                drill_results.elapsed_time,
-                drill_results.shots_fired,
-                json.dumps(drill_results.splits),  # Store splits as JSON
-                drill_results.average_split_time,
-                drill_results.fastest_split_time,
-                drill_results.slowest_split_time,
-                drill_results.score,
-                drill_results.notes
-            )
-            self.db_manager.execute_query(insert_query, params)
-            
-            # Retrieve the last inserted ID and set it in the drill_results object
-            drill_results.id = self.db_manager.execute_query("SELECT last_insert_rowid()")[0][0]
-        else:
-            # Update existing record
-            update_query = '''
-            UPDATE drill_results
-            SET drill_name = ?, start_time = ?, end_time = ?, elapsed_time = ?, shots_fired = ?, 
-                splits = ?, average_split_time = ?, fastest_split_time = ?, slowest_split_time = ?, 
-                score = ?, notes = ?
-            WHERE id = ?
-            '''
-            params = (
-                drill_results.drill_name,
-                drill_results.start_time,
-                drill_results.end_time,
-                drill_results.elapsed_time,
-                drill_results.shots_fired,
-                json.dumps(drill_results.splits),  # Store splits as JSON
-                drill_results.average_split_time,
-                drill_results.fastest_split_time,
-                drill_results.slowest_split_time,
-                drill_results.score,
-                drill_results.notes,
-                drill_results.id
-            )
-            self.db_manager.execute_query(update_query, params)
+        self.upsert_many([drill_results])
+
+    def upsert_many(self, drill_results_list):
+        """
+        Insert or update several results in a single transaction.
+
+        Inserted results get their new id assigned from the cursor, which avoids
+        a separate last_insert_rowid() round trip. If the transaction fails,
+        those ids are reset to None so the results can be saved again.
+        """
+        insert_query = '''
+        INSERT INTO drill_results (
+            drill_name, start_time, end_time, elapsed_time, shots_fired, splits, 
+            average_split_time, fastest_split_time, slowest_split_time, score, notes
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+        update_query = '''
+        UPDATE drill_results
+        SET drill_name = ?, start_time = ?, end_time = ?, elapsed_time = ?, shots_fired = ?, 
+            splits = ?, average_split_time = ?, fastest_split_time = ?, slowest_split_time = ?, 
+            score = ?, notes = ?
+        WHERE id = ?
+        '''
+        changed_drills = set()
+        inserted = []
+        updated = []
+        try:
+            with self.db_manager.transaction():
+                for drill_results in drill_results_list:
+                    changed_drills.add(drill_results.drill_name)
+                    params = (
+                        drill_results.drill_name,
+                        drill_results.start_time,
+                        drill_results.end_time,
+                        drill_results.elapsed_time,
+                        drill_results.shots_fired,
+                        pack_splits(drill_results.splits),  # Store splits as packed microseconds
+                        drill_results.average_split_time,
+                        drill_results.fastest_split_time,
+                        drill_results.slowest_split_time,
+                        drill_results.score,
+                        drill_results.notes
+                    )
+                    if drill_results.id is None:
+                        # Insert new record
+                        drill_results.id = self.db_manager.execute(insert_query, params).lastrowid
+                        inserted.append(drill_results)
+                    else:
+                        # Update existing record, which may move it away from another drill
+                        old = self.select(drill_results.id)
+                        if old is None:
+                            continue
+                        changed_drills.add(old.drill_name)
+                        self.db_manager.execute(update_query, params + (drill_results.id,))
+                        updated.append((old, drill_results))
+        except Exception:
+            # The rollback discarded the new rows, so their ids must not become UPDATE targets
+            for drill_results in inserted:
+                drill_results.id = None
+            raise
+        for drill_name in changed_drills:
+            self.cache.invalidate(drill_name)
+        if self.event_bus is not None:
+            if inserted:
+                self.event_bus.resultsInserted.emit(inserted)
+            if updated:
+                self.event_bus.resultsUpdated.emit(updated)
 
     def delete(self, drill_results_id):
         delete_query = 'DELETE FROM drill_results WHERE id = ?'
-        self.db_manager.execute_query(delete_query, (drill_results_id,))
+        with self.db_manager.transaction():
+            old = self.select(drill_results_id)
+            if old is None:
+                return
+            self.db_manager.execute(delete_query, (drill_results_id,))
+        self.cache.invalidate(old.drill_name)
+        if self.event_bus is not None:
+            self.event_bus.resultsDeleted.emit([old])
+
+    def data_version(self, drill_name):
+        """Return a value that changes whenever the results of the drill change."""
+        return self.cache.version(drill_name)
 
     def select(self, drill_results_id):
-        select_query = 'SELECT * FROM drill_results WHERE id = ?'
-        result = self.db_manager.execute_query(select_query, (drill_results_id,))
-        if result:
-            row = result[0]
-            return DrillResults(
-                id=row[0],
-                drill_name=row[1],
-                start_time=row[2],
-                end_time=row[3],
-                elapsed_time=row[4],
-                shots_fired=row[5],
-                splits=json.loads(row[6]),
-                average_split_time=row[7],
-                fastest_split_time=row[8],
-                slowest_split_time=row[9],
-                score=row[10],
-                notes=row[11]
-            )
-        return None
+        select_query = f'SELECT {DRILL_RESULTS_COLUMNS} FROM drill_results WHERE id = ?'
+        results = self._fetch_results(select_query, (drill_results_id,))
+        return results[0] if results else None
 
     def count(self):
         count_query = 'SELECT COUNT(*) FROM drill_results'
         result = self.db_manager.execute_query(count_query)
         return result[0][0] if result else 0
     
-    def get_results_for_drill(self, drill, offset=0, limit=25):
+    def get_results_for_drill(self, drill, after=None, limit=25):
         """
-        Fetches a paginated list of results for a specific drill.
+        Fetches a page of results for a specific drill, newest first.
+
+        Pages are keyed on (end_time, id) so each page is an index range scan,
+        no matter how deep into the history it is.
 
         :param drill: The drill for which results are fetched.
-        :param offset: The offset from where to start fetching results.
+        :param after: The (end_time, id) key of the last result of the previous page, or None for the first page.
         :param limit: The maximum number of results to fetch.
         :return: A list of drill results.
         """
-        query = """
-        SELECT *
-        FROM drill_results
-        WHERE drill_name = ?
-        ORDER BY end_time DESC
-        LIMIT ? OFFSET ?
-        """
-        cursor = self.db_manager.cursor()
-        rows = []
-        try:
-            cursor.execute(query, (drill.name, limit, offset))
-            rows = cursor.fetchall()
-        except Exception as e:
-            print(f"An error occurred: {e}")
-        finally:
-            cursor.close()
+        return self._cached(drill.name, ('page', after, limit), self._query_results_for_drill, drill.name, after, limit)
 
-        results = []
-        for row in rows:
-            result = DrillResults(
-                id=row[0],
-                drill_name=row[1],
-                start_time=row[2],
-                end_time=row[3],
-                elapsed_time=row[4],
-                shots_fired=row[5],
-                splits=json.loads(row[6]),
-                average_split_time=row[7],
-                fastest_split_time=row[8],
-                slowest_split_time=row[9],
-                score=row[10],
-                notes=row[11]
-            )
-            results.append(result)
-        return results
+    def _query_results_for_drill(self, drill_name, after, limit):
+        if after is None:
+            query = f"""
+            SELECT {DRILL_RESULTS_COLUMNS}
+            FROM drill_results
+            WHERE drill_name = ?
+            ORDER BY end_time DESC, id DESC
+            LIMIT ?
+            """
+            params = (drill_name, limit)
+        else:
+            query = f"""
+            SELECT {DRILL_RESULTS_COLUMNS}
+            FROM drill_results
+            WHERE drill_name = ?
+            AND (end_time, id) < (?, ?)
+            ORDER BY end_time DESC, id DESC
+            LIMIT ?
+            """
+            params = (drill_name, after[0], after[1], limit)
+        return self._fetch_results(query, params)
     
+    @staticmethod
+    def page_key(drill_results):
+        """Return the key to pass as after= to fetch the page following drill_results."""
+        return (drill_results.end_time, drill_results.id)
+
     def get_results_for_drill_name(self, name, between=None):
-        query = """
-        SELECT *
+        between = tuple(between) if between is not None else None
+        return self._cached(name, ('window', between), self._query_results_for_drill_name, name, between)
+
+    def _query_results_for_drill_name(self, name, between):
+        query = f"""
+        SELECT {DRILL_RESULTS_COLUMNS}
         FROM drill_results
         WHERE drill_name = ?
         ORDER BY end_time
-        """ if between is None else """
-        SELECT *
+        """ if between is None else f"""
+        SELECT {DRILL_RESULTS_COLUMNS}
         FROM drill_results
         WHERE drill_name = ?
         AND start_time >= ?
         AND end_time <= ?
         ORDER BY end_time DESC
         """
+        params = (name,) if between is None else (name, between[0], between[1])
+        return self._fetch_results(query, params)
+
+    def get_aggregates(self, name, kind='day', between=None):
+        """
+        Fetches the per-day or per-week aggregates of a drill, oldest first.
+
+        Aggregates are kept up to date by triggers on drill_results, so this
+        reads one row per bucket no matter how many sessions it summarizes.
+
+        :param name: The name of the drill.
+        :param kind: 'day' or 'week'.
+        :param between: Optional (start, end) window in epoch milliseconds; buckets overlapping it are returned.
+        :return: A list of DrillResultsAggregate.
+        """
+        if kind not in BUCKET_KINDS:
+            raise ValueError(f"kind must be one of {BUCKET_KINDS}")
+        between = tuple(between) if between is not None else None
+        return self._cached(name, ('aggregates', kind, between), self._query_aggregates, name, kind, between)
+
+    def _query_aggregates(self, name, kind, between):
+        query = f"""
+        SELECT {AGGREGATE_COLUMNS}
+        FROM drill_result_aggregates
+        WHERE drill_name = ? AND bucket_kind = ?
+        """
+        params = (name, kind)
+        if between is not None:
+            query += f" AND bucket_start >= {bucket_bound('?', kind)} AND bucket_start <= ?"
+            params += (between[0], between[1])
+        query += " ORDER BY bucket_start"
+        try:
+            return [DrillResultsAggregate(*row) for row in self.db_manager.execute_query(query, params)]
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return []
+
+    def rebuild_aggregates(self):
+        """Recompute all aggregates from the raw results."""
+        with self.db_manager.transaction():
+            rebuild_aggregates(self.db_manager)
+        self.cache.invalidate_all()
+        if self.event_bus is not None:
+            self.event_bus.resultsReset.emit()
+
+    def _cached(self, drill_name, key, query_function, *args):
+        """Serve a query from the cache, running query_function on a miss; returns a new list either way."""
+        results = self.cache.get(drill_name, key)
+        if results is None:
+            version = self.cache.version(drill_name)
+            results = query_function(*args)
+            self.cache.put(drill_name, key, results, version)
+        return list(results)
+
+    def _fetch_results(self, query, params):
+        """Run a SELECT of DRILL_RESULTS_COLUMNS and map every row to DrillResults."""
         cursor = self.db_manager.cursor()
-        rows = []
+        cursor.row_factory = drill_results_row_factory
         try:
-            if between is None:
-                cursor.execute(query, (name,))
-            else:
-                cursor.execute(query, (name, between[0], between[1]))
-            rows = cursor.fetchall()
+            cursor.execute(query, params)
+            return cursor.fetchall()
         except Exception as e:
             print(f"An error occurred: {e}")
+            return []
         finally:
             cursor.close()
 
-        results = []
-        for row in rows:
-            result = DrillResults(
-                id=row[0],
-                drill_name=row[1],
-                start_time=row[2],
-                end_time=row[3],
-                elapsed_time=row[4],
-                shots_fired=row[5],
-                splits=json.loads(row[6]),
-                average_split_time=row[7],
-                fastest_split_time=row[8],
-                slowest_split_time=row[9],
-                score=row[10],
-                notes=row[11]
-            )
-            results.append(result)
-        return results
+    def search_notes(self, text, drill_name=None, limit=50, markers=('[', ']')):
+        """
+        Full-text search over session notes, best matches first.
+
+        :param text: Words to look for; see notes_match_query.
+        :param drill_name: Optionally restrict the search to one drill.
+        :param limit: The maximum number of matches to return.
+        :param markers: Strings placed before and after each matched word in the snippet.
+        :return: A list of (drill_results_id, snippet) tuples.
+        """
+        match = notes_match_query(text)
+        if match is None:
+            return []
+        query = """
+        SELECT drill_results.id, snippet(drill_results_fts, 0, ?, ?, '...', 12)
+        FROM drill_results_fts
+        JOIN drill_results ON drill_results.id = drill_results_fts.rowid
+        WHERE drill_results_fts MATCH ?
+        """
+        params = (markers[0], markers[1], match)
+        if drill_name is not None:
+            query += " AND drill_results.drill_name = ?"
+            params += (drill_name,)
+        query += " ORDER BY bm25(drill_results_fts) LIMIT ?"
+        try:
+            return [(row[0], row[1]) for row in self.db_manager.execute_query(query, params + (limit,))]
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return []
+
+    def get_results_by_ids(self, ids):
+        """Fetch the results with the given ids, in the order of ids; ids that no longer exist are skipped."""
+        ids = list(ids)
+        if not ids:
+            return []
+        placeholders = ', '.join('?' * len(ids))
+        query = f'SELECT {DRILL_RESULTS_COLUMNS} FROM drill_results WHERE id IN ({placeholders})'
+        results = {result.id: result for result in self._fetch_results(query, ids)}
+        return [results[drill_results_id] for drill_results_id in ids if drill_results_id in results]
+
+    def get_average_first_shot_time(self, name, between):
+        """
+        Average time from the start signal to the first shot, computed inside SQLite.
+
+        :param name: The name of the drill.
+        :param between: (start, end) window in epoch milliseconds.
+        :return: The average in microseconds, or None if no session in the window has a shot.
+        """
+        query = """
+        SELECT AVG(split_us(splits, 0))
+        FROM drill_results
+        WHERE drill_name = ?
+        AND start_time >= ?
+        AND end_time <= ?
+        """
+        return self.db_manager.execute_query(query, (name, between[0], between[1]))[0][0]
@@ -0,0 +1,167 @@
+import csv
+import json
+from itertools import islice
+from dal.split_codec import pack_splits, unpack_splits
+
+# Fields of an exported record, in CSV column order. Ids are exported for
+# reference only; imported rows always get new ids from the target database.
+EXPORT_FIELDS = (
+    'id', 'drill_name', 'start_time', 'end_time', 'elapsed_time', 'shots_fired', 'splits',
+    'average_split_time', 'fastest_split_time', 'slowest_split_time', 'score', 'notes'
+)
+
+_INTEGER_FIELDS = ('id', 'start_time', 'end_time', 'elapsed_time', 'shots_fired')
+_REAL_FIELDS = ('average_split_time', 'fastest_split_time', 'slowest_split_time', 'score')
+
+_IMPORT_COLUMNS = (
+    'drill_name, start_time, end_time, elapsed_time, shots_fired, splits, '
+    'average_split_time, fastest_split_time, slowest_split_time, score, notes'
+)
+
+class DrillResultsTransfer:
+    """
+    Streams drill_results to and from CSV/JSONL files.
+
+    Exports read the table in fixed-size batches so memory use stays constant,
+    and imports write through executemany in large transactions. A session is
+    identified by (drill_name, start_time, end_time) when checking for
+    conflicts, because ids are only meaningful within one database.
+    """
+
+    def __init__(self, db_manager, batch_size=5000, cache=None, event_bus=None):
+        """
+        :param db_manager: Connected DatabaseManager to read from or write to.
+        :param batch_size: Number of rows per fetch when exporting and per transaction when importing.
+        :param cache: ResultCache to invalidate after an import changed rows.
+        :param event_bus: ResultsEventBus to send resultsReset on after an import changed rows.
+        """
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.cache = cache
+        self.event_bus = event_bus
+
+    def iter_records(self, drill_name=None):
+        """Yield every result (optionally of one drill) as a dict of EXPORT_FIELDS, in id order."""
+        query = f"SELECT {', '.join(EXPORT_FIELDS)} FROM drill_results"
+        params = ()
+        if drill_name is not None:
+            query += " WHERE drill_name = ?"
+            params = (drill_name,)
+        query += " ORDER BY id"
+        cursor = self.db_manager.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    record = dict(zip(EXPORT_FIELDS, row))
+                    record['splits'] = unpack_splits(record['splits']).tolist()
+                    yield record
+        finally:
+            cursor.close()
+
+    def export_jsonl(self, file_path, drill_name=None):
+        """Write one JSON object per result to file_path and return the number of results written."""
+        count = 0
+        with open(file_path, 'w', encoding='utf-8') as file:
+            for record in self.iter_records(drill_name):
+                file.write(json.dumps(record))
+                file.write('\n')
+                count += 1
+        return count
+
+    def export_csv(self, file_path, drill_name=None):
+        """Write results to a CSV file with splits as space-separated microseconds and return the count."""
+        count = 0
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(EXPORT_FIELDS)
+            for record in self.iter_records(drill_name):
+                record['splits'] = ' '.join(str(split) for split in record['splits'])
+                writer.writerow(record[field] for field in EXPORT_FIELDS)
+                count += 1
+        return count
+
+    def import_jsonl(self, file_path, on_conflict='skip'):
+        """Import results from a JSONL export. See import_records for on_conflict."""
+        with open(file_path, 'r', encoding='utf-8') as file:
+            records = (json.loads(line) for line in file if line.strip())
+            return self.import_records(records, on_conflict)
+
+    def import_csv(self, file_path, on_conflict='skip'):
+        """Import results from a CSV export. See import_records for on_conflict."""
+        with open(file_path, 'r', encoding='utf-8', newline='') as file:
+            records = (self._parse_csv_record(record) for record in csv.DictReader(file))
+            return self.import_records(records, on_conflict)
+
+    def import_records(self, records, on_conflict='skip'):
+        """
+        Import result dicts in batches of batch_size, one transaction per batch.
+
+        :param records: Iterable of dicts with the EXPORT_FIELDS keys (id is ignored).
+        :param on_conflict: 'skip' keeps a session that already exists, 'replace' overwrites it with the imported values.
+        :return: The number of rows inserted or replaced.
+        """
+        if on_conflict not in ('skip', 'replace'):
+            raise ValueError("on_conflict must be 'skip' or 'replace'")
+
+        update_query = '''
+        UPDATE drill_results
+        SET elapsed_time = ?, shots_fired = ?, splits = ?, average_split_time = ?,
+            fastest_split_time = ?, slowest_split_time = ?, score = ?, notes = ?
+        WHERE drill_name = ? AND start_time = ? AND end_time = ?
+        '''
+        insert_query = f'''
+        INSERT INTO drill_results ({_IMPORT_COLUMNS})
+        SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+        WHERE NOT EXISTS (
+            SELECT 1 FROM drill_results WHERE drill_name = ? AND start_time = ? AND end_time = ?
+        )
+        '''
+        connection = self.db_manager.connection
+        changed = 0
+        records = iter(records)
+        while True:
+            batch = [self._to_params(record) for record in islice(records, self.batch_size)]
+            if not batch:
+                break
+            # rowcount counts only drill_results rows, not the writes made by its triggers
+            with self.db_manager.transaction():
+                if on_conflict == 'replace':
+                    changed += connection.executemany(update_query, (params[3:] + params[:3] for params in batch)).rowcount
+                changed += connection.executemany(insert_query, (params + params[:3] for params in batch)).rowcount
+        if changed and self.cache is not None:
+            self.cache.invalidate_all()
+        if changed and self.event_bus is not None:
+            self.event_bus.resultsReset.emit()
+        return changed
+
+    @staticmethod
+    def _to_params(record):
+        # Key columns first so the conflict checks can reuse params[:3]
+        return (
+            record['drill_name'],
+            record['start_time'],
+            record['end_time'],
+            record['elapsed_time'],
+            record['shots_fired'],
+            pack_splits(record['splits']),
+            record.get('average_split_time'),
+            record.get('fastest_split_time'),
+            record.get('slowest_split_time'),
+            record.get('score'),
+            record.get('notes')
+        )
+
+    @staticmethod
+    def _parse_csv_record(record):
+        for field in _INTEGER_FIELDS:
+            record[field] = int(record[field]) if record.get(field) else None
+        for field in _REAL_FIELDS:
+            record[field] = float(record[field]) if record.get(field) else None
+        record['splits'] = [int(split) for split in record['splits'].split()]
+        if record.get('notes') == '':
+            record['notes'] = None
+        return record
@@ -0,0 +1,128 @@
+# Ordered schema migrations, tracked with SQLite's PRAGMA user_version.
+#
+# Each migration is (version, description, steps). A step is either an SQL
+# statement or a callable taking the DatabaseManager, for changes that need
+# Python. Migrations are append-only: never edit one that has shipped, add a
+# new one with the next version instead.
+
+from dal.split_codec import legacy_splits_to_blob
+from dal.result_aggregates import CREATE_AGGREGATES_TABLE, CREATE_AGGREGATE_TRIGGERS, rebuild_aggregates
+
+def _pack_splits_column(db_manager):
+    # SQLite cannot change a column's type in place, so rebuild the table with
+    # splits as a BLOB and convert each row's JSON text on the way over
+    db_manager.connection.create_function('legacy_splits_to_blob', 1, legacy_splits_to_blob, deterministic=True)
+    db_manager.execute('''
+    CREATE TABLE drill_results_packed (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        drill_name TEXT NOT NULL,
+        start_time INTEGER NOT NULL,
+        end_time INTEGER NOT NULL,
+        elapsed_time INTEGER NOT NULL,
+        shots_fired INTEGER NOT NULL,
+        splits BLOB NOT NULL,
+        average_split_time REAL,
+        fastest_split_time REAL,
+        slowest_split_time REAL,
+        score REAL,
+        notes TEXT
+    )
+    ''')
+    db_manager.execute('''
+    INSERT INTO drill_results_packed
+    SELECT id, drill_name, start_time, end_time, elapsed_time, shots_fired, legacy_splits_to_blob(splits),
+           average_split_time,
+           -- Older versions stored the text 'N/A' when a string had no shots
+           CASE WHEN typeof(fastest_split_time) IN ('integer', 'real') THEN fastest_split_time END,
+           CASE WHEN typeof(slowest_split_time) IN ('integer', 'real') THEN slowest_split_time END,
+           score, notes
+    FROM drill_results
+    ''')
+    db_manager.execute('DROP TABLE drill_results')
+    db_manager.execute('ALTER TABLE drill_results_packed RENAME TO drill_results')
+    db_manager.execute('CREATE INDEX idx_drill_results_drill_end ON drill_results (drill_name, end_time)')
+    db_manager.execute('CREATE INDEX idx_drill_results_drill_start_end ON drill_results (drill_name, start_time, end_time)')
+
+MIGRATIONS = [
+    (1, "Create drill_results", [
+        '''
+        CREATE TABLE IF NOT EXISTS drill_results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            drill_name TEXT NOT NULL,
+            start_time INTEGER NOT NULL,
+            end_time INTEGER NOT NULL,
+            elapsed_time INTEGER NOT NULL,
+            shots_fired INTEGER NOT NULL,
+            splits TEXT NOT NULL,
+            average_split_time REAL,
+            fastest_split_time REAL,
+            slowest_split_time REAL,
+            score REAL,
+            notes TEXT
+        )
+        ''',
+    ]),
+    (2, "Index drill_results by drill and time", [
+        # History: WHERE drill_name = ? ORDER BY end_time DESC
+        'CREATE INDEX IF NOT EXISTS idx_drill_results_drill_end ON drill_results (drill_name, end_time)',
+        # Analytics: WHERE drill_name = ? AND start_time >= ? AND end_time <= ?
+        'CREATE INDEX IF NOT EXISTS idx_drill_results_drill_start_end ON drill_results (drill_name, start_time, end_time)',
+    ]),
+    (3, "Store splits as packed int32 microseconds", [
+        _pack_splits_column,
+    ]),
+    (4, "Add daily and weekly drill_results aggregates", [
+        CREATE_AGGREGATES_TABLE,
+        *CREATE_AGGREGATE_TRIGGERS,
+        rebuild_aggregates,
+    ]),
+    (5, "Add full-text search over drill_results notes", [
+        # External content table: the index stores only tokens, notes stay in drill_results.
+        # Table rebuilds like migration 3 must end with a 'rebuild' of this index.
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS drill_results_fts USING fts5(
+            notes, content='drill_results', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_drill_results_fts_insert AFTER INSERT ON drill_results BEGIN
+            INSERT INTO drill_results_fts (rowid, notes) VALUES (NEW.id, NEW.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_drill_results_fts_delete AFTER DELETE ON drill_results BEGIN
+            INSERT INTO drill_results_fts (drill_results_fts, rowid, notes) VALUES ('delete', OLD.id, OLD.notes);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_drill_results_fts_update AFTER UPDATE OF notes ON drill_results BEGIN
+            INSERT INTO drill_results_fts (drill_results_fts, rowid, notes) VALUES ('delete', OLD.id, OLD.notes);
+            INSERT INTO drill_results_fts (rowid, notes) VALUES (NEW.id, NEW.notes);
+        END
+        ''',
+        "INSERT INTO drill_results_fts (drill_results_fts) VALUES ('rebuild')",
+    ]),
+]
+
+def schema_version(db_manager):
+    """Return the version of the last migration applied to the database."""
+    return db_manager.execute_query("PRAGMA user_version")[0][0]
+
+def apply_migrations(db_manager, migrations=MIGRATIONS):
+    """Apply every migration newer than the database's user_version, in order, each in its own transaction."""
+    current_version = schema_version(db_manager)
+    for version, description, steps in migrations:
+        if version <= current_version:
+            continue
+        with db_manager.transaction():
+            # Another connection may have migrated while we waited for the write lock
+            if schema_version(db_manager) >= version:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(db_manager)
+                else:
+                    db_manager.execute(step)
+            db_manager.execute(f"PRAGMA user_version = {int(version)}")
+        print(f"Applied database migration {version}: {description}")
+        current_version = version
@@ -0,0 +1,86 @@
+import queue
+from PyQt6.QtCore import QThread, pyqtSignal
+from dal.db_manager import DatabaseManager
+from dal.drill_results_repository import DrillResultsRepository
+
+_STOP = object()
+
+class PersistenceWorker(QThread):
+    """
+    Writes drill results on a background thread so saving never blocks the UI.
+
+    Results are queued with save() and committed in batches through a separate
+    database connection owned by the worker thread. resultSaved is emitted for
+    every result once it is committed, with its id filled in. If a batch
+    fails, its results are retried one at a time so one bad result cannot
+    take the others down with it; results that still fail are reported
+    through saveFailed with the error message.
+    """
+    resultSaved = pyqtSignal(object)
+    saveFailed = pyqtSignal(object, str)
+
+    def __init__(self, db_name, cache=None, event_bus=None, max_pending=64, batch_size=16, parent=None):
+        """
+        :param db_name: Path of the SQLite database to write to.
+        :param cache: ResultCache shared with the readers, invalidated as results are written.
+        :param event_bus: ResultsEventBus told about every result once it is committed.
+        :param max_pending: Maximum number of queued results; save() blocks when the queue is full.
+        :param batch_size: Maximum number of results committed in one transaction.
+        """
+        super().__init__(parent)
+        self.db_name = db_name
+        self.cache = cache
+        self.event_bus = event_bus
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    def save(self, drill_results):
+        """Queue drill results to be inserted or updated."""
+        self._queue.put(drill_results)
+
+    def stop(self):
+        """Write everything still queued, then stop the thread and wait for it to finish."""
+        if self.isRunning():
+            self._queue.put(_STOP)
+            self.wait()
+
+    def run(self):
+        db_manager = DatabaseManager(self.db_name)
+        db_manager.connect()
+        repository = DrillResultsRepository(db_manager, self.cache, self.event_bus)
+        try:
+            running = True
+            while running:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if _STOP in batch:
+                    running = False
+                    batch = [drill_results for drill_results in batch if drill_results is not _STOP]
+                    # Drain whatever was queued behind the stop request as well
+                    while not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                if not batch:
+                    continue
+                try:
+                    repository.upsert_many(batch)
+                except Exception:
+                    # upsert_many reset the ids it had assigned, so each result can be retried on its own
+                    self._save_each(repository, batch)
+                    continue
+                for drill_results in batch:
+                    self.resultSaved.emit(drill_results)
+        finally:
+            db_manager.close()
+
+    def _save_each(self, repository, batch):
+        for drill_results in batch:
+            try:
+                repository.upsert(drill_results)
+            except Exception as e:
+                self.saveFailed.emit(drill_results, str(e))
+                continue
+            self.resultSaved.emit(drill_results)
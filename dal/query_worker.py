@@ -0,0 +1,97 @@
+import queue
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+from dal.db_manager import DatabaseManager
+from dal.drill_results_repository import DrillResultsRepository
+
+_STOP = object()
+
+class QueryWorker(QThread):
+    """
+    Runs DrillResultsRepository reads on a background thread so queries never block the UI.
+
+    Queries are submitted on a channel (e.g. one per screen) with a callback.
+    Only the latest query of a channel is current: submitting a new one or
+    calling cancel() supersedes the previous query, which is then skipped if it
+    has not started yet and has its result dropped if it has. Callbacks are
+    invoked on the thread that owns the worker (the UI thread) through a queued
+    signal, with the method's return value, or None if the query raised.
+    """
+    _queryFinished = pyqtSignal(int, str, object)
+
+    def __init__(self, db_name, cache=None, parent=None):
+        """
+        :param db_name: Path of the SQLite database to read from.
+        :param cache: ResultCache shared with the other repositories, so reads can be served from memory.
+        """
+        super().__init__(parent)
+        self.db_name = db_name
+        self.cache = cache
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_ticket = 0
+        self._current = {}
+        self._callbacks = {}
+        self._queryFinished.connect(self._deliver)
+
+    def submit(self, channel, callback, method_name, *args):
+        """
+        Queue repository.method_name(*args), superseding the channel's previous query.
+
+        :return: A ticket identifying the query.
+        """
+        with self._lock:
+            self._next_ticket += 1
+            ticket = self._next_ticket
+            superseded = self._current.get(channel)
+            self._callbacks.pop(superseded, None)
+            self._current[channel] = ticket
+            self._callbacks[ticket] = callback
+        self._queue.put((ticket, channel, method_name, args))
+        return ticket
+
+    def cancel(self, channel):
+        """Drop the channel's pending query, if any; its callback will not be called."""
+        with self._lock:
+            ticket = self._current.pop(channel, None)
+            self._callbacks.pop(ticket, None)
+
+    def stop(self):
+        """Stop the thread once the query in progress finishes, dropping queries still queued."""
+        if self.isRunning():
+            self._queue.put(_STOP)
+            self.wait()
+
+    def _is_current(self, ticket, channel):
+        with self._lock:
+            return self._current.get(channel) == ticket
+
+    def run(self):
+        db_manager = DatabaseManager(self.db_name)
+        db_manager.connect()
+        repository = DrillResultsRepository(db_manager, self.cache)
+        try:
+            while True:
+                request = self._queue.get()
+                if request is _STOP:
+                    break
+                ticket, channel, method_name, args = request
+                if not self._is_current(ticket, channel):
+                    continue  # Superseded while waiting in the queue
+                try:
+                    result = getattr(repository, method_name)(*args)
+                except Exception as e:
+                    print(f"An error occurred while running {method_name}: {e}")
+                    result = None
+                self._queryFinished.emit(ticket, channel, result)
+        finally:
+            db_manager.close()
+
+    def _deliver(self, ticket, channel, result):
+        # Runs on the owning thread; the channel may have moved on since the query started
+        with self._lock:
+            if self._current.get(channel) != ticket:
+                return
+            del self._current[channel]
+            callback = self._callbacks.pop(ticket)
+        callback(result)
@@ -0,0 +1,98 @@
+# Per-drill daily and weekly aggregates of drill_results.
+#
+# drill_result_aggregates holds one row per (drill, bucket kind, bucket start)
+# so analytics read O(buckets) rows instead of every session. Triggers on
+# drill_results recompute just the buckets a written row falls in, from the
+# raw rows of that bucket, which keeps MIN/MAX correct after updates and
+# deletes. Buckets follow local calendar days and Monday-based weeks, with
+# bounds in epoch milliseconds like the rest of the table.
+
+from datetime import datetime, timedelta
+
+BUCKET_KINDS = ('day', 'week')
+
+# SQLite date modifiers giving the (start, next start) of the bucket a local time falls in
+_BUCKET_MODIFIERS = {
+    'day': ("'start of day'", "'start of day', '+1 day'"),
+    'week': ("'weekday 0', '-6 days', 'start of day'", "'weekday 0', '+1 day', 'start of day'"),
+}
+
+AGGREGATE_COLUMNS = (
+    'drill_name, bucket_kind, bucket_start, session_count, shots_fired, fastest_split_time, '
+    'slowest_split_time, average_split_time, min_score, max_score, average_score'
+)
+
+CREATE_AGGREGATES_TABLE = '''
+CREATE TABLE IF NOT EXISTS drill_result_aggregates (
+    drill_name TEXT NOT NULL,
+    bucket_kind TEXT NOT NULL,
+    bucket_start INTEGER NOT NULL,
+    session_count INTEGER NOT NULL,
+    shots_fired INTEGER NOT NULL,
+    fastest_split_time REAL,
+    slowest_split_time REAL,
+    average_split_time REAL,
+    min_score REAL,
+    max_score REAL,
+    average_score REAL,
+    PRIMARY KEY (drill_name, bucket_kind, bucket_start)
+) WITHOUT ROWID
+'''
+
+def bucket_bound(time_expression, kind, bound=0):
+    """SQL expression for the start (bound=0) or end (bound=1) in epoch ms of the bucket a time in epoch ms falls in."""
+    modifiers = _BUCKET_MODIFIERS[kind][bound]
+    return f"CAST(strftime('%s', ({time_expression}) / 1000, 'unixepoch', 'localtime', {modifiers}, 'utc') AS INTEGER) * 1000"
+
+def bucket_start(ms, kind):
+    """Python counterpart of bucket_bound: start in epoch ms of the local day or week containing ms."""
+    local = datetime.fromtimestamp(ms // 1000).replace(hour=0, minute=0, second=0, microsecond=0)
+    if kind == 'week':
+        local -= timedelta(days=local.weekday())
+    return int(local.timestamp()) * 1000
+
+_AGGREGATE_SELECT = '''
+SELECT drill_name, '{kind}', {bucket_start}, COUNT(*), SUM(shots_fired),
+       MIN(fastest_split_time), MAX(slowest_split_time), AVG(average_split_time),
+       MIN(score), MAX(score), AVG(score)
+FROM drill_results
+'''
+
+def _refresh_bucket(row, kind):
+    # Recompute the bucket of the NEW or OLD row; GROUP BY yields no row once the bucket is empty
+    start = bucket_bound(f'{row}.end_time', kind, 0)
+    end = bucket_bound(f'{row}.end_time', kind, 1)
+    return f'''
+    DELETE FROM drill_result_aggregates
+    WHERE drill_name = {row}.drill_name AND bucket_kind = '{kind}' AND bucket_start = {start};
+    INSERT INTO drill_result_aggregates ({AGGREGATE_COLUMNS})
+    {_AGGREGATE_SELECT.format(kind=kind, bucket_start=start)}
+    WHERE drill_name = {row}.drill_name AND end_time >= {start} AND end_time < {end}
+    GROUP BY drill_name;
+    '''
+
+def _trigger(name, event, rows):
+    body = ''.join(_refresh_bucket(row, kind) for row in rows for kind in BUCKET_KINDS)
+    return f'CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON drill_results BEGIN {body} END'
+
+CREATE_AGGREGATE_TRIGGERS = [
+    _trigger('trg_drill_results_aggregates_insert', 'INSERT', ('NEW',)),
+    _trigger('trg_drill_results_aggregates_delete', 'DELETE', ('OLD',)),
+    # Refresh the old bucket as well, in case the update moved the row to another drill or day
+    _trigger(
+        'trg_drill_results_aggregates_update',
+        'UPDATE OF drill_name, end_time, shots_fired, fastest_split_time, slowest_split_time, average_split_time, score',
+        ('OLD', 'NEW')
+    ),
+]
+
+def rebuild_aggregates(db_manager):
+    """Recompute every aggregate from drill_results, e.g. after the local timezone changed."""
+    db_manager.execute('DELETE FROM drill_result_aggregates')
+    for kind in BUCKET_KINDS:
+        bucket_start = bucket_bound('end_time', kind)
+        db_manager.execute(f'''
+        INSERT INTO drill_result_aggregates ({AGGREGATE_COLUMNS})
+        {_AGGREGATE_SELECT.format(kind=kind, bucket_start=bucket_start)}
+        GROUP BY drill_name, {bucket_start}
+        ''')
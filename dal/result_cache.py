@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    Bounded LRU cache of query results, invalidated per drill through a data version.
+
+    Every entry remembers the drill's data version at the time its query
+    started; bumping the version on a write makes all older entries for that
+    drill misses. The cache is thread-safe so repositories on different
+    connections (e.g. the persistence worker) can share it.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def version(self, drill_name):
+        """Return the current data version of a drill; it changes whenever the drill's results change."""
+        with self._lock:
+            return (self._generation, self._versions.get(drill_name, 0))
+
+    def get(self, drill_name, key):
+        """Return the cached value for (drill_name, key), or None if missing or stale."""
+        with self._lock:
+            entry = self._entries.get((drill_name, key))
+            if entry is None:
+                return None
+            version, value = entry
+            if version != (self._generation, self._versions.get(drill_name, 0)):
+                del self._entries[(drill_name, key)]
+                return None
+            self._entries.move_to_end((drill_name, key))
+            return value
+
+    def put(self, drill_name, key, value, version):
+        """
+        Store a value computed from data at the given version.
+
+        Pass the version read before running the query, so a write that lands
+        while the query runs leaves the entry stale instead of wrongly fresh.
+        """
+        with self._lock:
+            self._entries[(drill_name, key)] = (version, value)
+            self._entries.move_to_end((drill_name, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, drill_name):
+        """Mark every cached result of a drill as stale."""
+        with self._lock:
+            self._versions[drill_name] = self._versions.get(drill_name, 0) + 1
+
+    def invalidate_all(self):
+        """Mark every cached result as stale, e.g. after a bulk import."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
@@ -0,0 +1,19 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class ResultsEventBus(QObject):
+    """
+    Application-wide notifications about changes to drill_results.
+
+    Repositories emit after the change is committed, from whichever thread
+    wrote it; slots of QObjects living on the UI thread receive the events
+    through queued connections. Screens use them to patch what they show
+    instead of querying again.
+    """
+    # List of inserted DrillResults, with their new ids
+    resultsInserted = pyqtSignal(list)
+    # List of (old, new) DrillResults pairs
+    resultsUpdated = pyqtSignal(list)
+    # List of the deleted DrillResults
+    resultsDeleted = pyqtSignal(list)
+    # Too many results changed to describe them one by one (e.g. a bulk import); reload instead
+    resultsReset = pyqtSignal()
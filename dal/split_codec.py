@@ -0,0 +1,38 @@
+import json
+import numpy as np
+
+# Splits are stored as packed little-endian int32 microseconds, which covers
+# strings of up to ~35 minutes and decodes with a single np.frombuffer call
+SPLIT_DTYPE = np.dtype('<i4')
+
+def pack_splits(splits):
+    """Pack a sequence of split times in microseconds into a BLOB."""
+    return np.asarray(splits, dtype=SPLIT_DTYPE).tobytes()
+
+def unpack_splits(blob):
+    """Return the split times stored in a BLOB as a read-only int32 array, without copying."""
+    return np.frombuffer(blob, dtype=SPLIT_DTYPE)
+
+def split_at(blob, index):
+    """SQL function split_us(splits, index): the split at index in microseconds, or NULL if there is none."""
+    if blob is None or index is None or index < 0 or (index + 1) * SPLIT_DTYPE.itemsize > len(blob):
+        return None
+    return int(np.frombuffer(blob, dtype=SPLIT_DTYPE, count=1, offset=index * SPLIT_DTYPE.itemsize)[0])
+
+def legacy_split_to_us(split):
+    """Convert a split from the old JSON column, either a "mm:ss.zzz" string or integer microseconds."""
+    if isinstance(split, str):
+        minutes, rest = split.split(":")
+        seconds, milliseconds = rest.split(".")
+        return ((int(minutes) * 60 + int(seconds)) * 1000 + int(milliseconds)) * 1000
+    return int(split)
+
+def legacy_splits_to_blob(text):
+    """SQL function used by the migration from the JSON text column to packed splits."""
+    if isinstance(text, bytes):
+        return text
+    return pack_splits([legacy_split_to_us(split) for split in json.loads(text or '[]')])
+
+def register_split_functions(connection):
+    """Make split_us(splits, index) available in SQL on this connection."""
+    connection.create_function('split_us', 2, split_at, deterministic=True)
@@ -1,20 +1,50 @@
 import json
 
 class DrillResults:
-    def __init__(self, drill_name, start_time, end_time, elapsed_time, shots_fired, splits, average_split_time=None, fastest_split_time=None, slowest_split_time=None, score=None, notes=None, id=None):
+    # Slots keep each instance small when thousands of results are loaded for analytics
+    __slots__ = (
+        'id', 'drill_name', 'start_time', 'end_time', 'elapsed_time', 'shots_fired',
+        '_splits', '_splits_decoder', 'average_split_time', 'fastest_split_time',
+        'slowest_split_time', 'score', 'notes'
+    )
+
+    def __init__(self, drill_name, start_time, end_time, elapsed_time, shots_fired, splits, average_split_time=None, fastest_split_time=None, slowest_split_time=None, score=None, notes=None, id=None, splits_decoder=None):
+        """
+        :param splits: Split times in microseconds, or their stored form when splits_decoder is given.
+        :param splits_decoder: Optional callable turning the stored splits into split times; it is only
+            called the first time splits is read, so results that never look at their splits skip decoding.
+        """
         self.id = id  # ID is None by default, will be set after insertion into the database
         self.drill_name = drill_name
         self.start_time = start_time
         self.end_time = end_time
         self.elapsed_time = elapsed_time
         self.shots_fired = shots_fired
-        self.splits = splits
+        self._splits = splits
+        self._splits_decoder = splits_decoder
         self.average_split_time = average_split_time
         self.fastest_split_time = fastest_split_time
         self.slowest_split_time = slowest_split_time
         self.score = score
         self.notes = notes
 
+    @property
+    def splits(self):
+        if self._splits_decoder is not None:
+            self._splits = self._splits_decoder(self._splits)
+            self._splits_decoder = None
+        return self._splits
+
+    @splits.setter
+    def splits(self, value):
+        self._splits = value
+        self._splits_decoder = None
+
+    @property
+    def packed_splits(self):
+        """The splits in their stored form while they have not been decoded yet, otherwise None."""
+        return self._splits if self._splits_decoder is not None else None
+
     def to_json(self):
         return json.dumps({
             'id': self.id,
@@ -23,7 +53,7 @@ class DrillResults:
             'end_time': self.end_time,
             'elapsed_time': self.elapsed_time,
             'shots_fired': self.shots_fired,
-            'splits': self.splits,
+            'splits': [int(split) for split in self.splits],
             'average_split_time': self.average_split_time,
             'fastest_split_time': self.fastest_split_time,
             'slowest_split_time': self.slowest_split_time,
@@ -0,0 +1,55 @@
+def _min(current, value):
+    return value if current is None else current if value is None else min(current, value)
+
+def _max(current, value):
+    return value if current is None else current if value is None else max(current, value)
+
+def _mean(current, count, value):
+    if value is None:
+        return current
+    if current is None:
+        return value
+    return (current * count + value) / (count + 1)
+
+class DrillResultsAggregate:
+    """Summary of the sessions of one drill within a day or week bucket."""
+    __slots__ = (
+        'drill_name', 'bucket_kind', 'bucket_start', 'session_count', 'shots_fired',
+        'fastest_split_time', 'slowest_split_time', 'average_split_time',
+        'min_score', 'max_score', 'average_score'
+    )
+
+    def __init__(self, drill_name, bucket_kind, bucket_start, session_count, shots_fired, fastest_split_time=None, slowest_split_time=None, average_split_time=None, min_score=None, max_score=None, average_score=None):
+        """
+        :param bucket_kind: 'day' or 'week'.
+        :param bucket_start: Start of the bucket in epoch milliseconds (local midnight, Monday for weeks).
+        """
+        self.drill_name = drill_name
+        self.bucket_kind = bucket_kind
+        self.bucket_start = bucket_start
+        self.session_count = session_count
+        self.shots_fired = shots_fired
+        self.fastest_split_time = fastest_split_time
+        self.slowest_split_time = slowest_split_time
+        self.average_split_time = average_split_time
+        self.min_score = min_score
+        self.max_score = max_score
+        self.average_score = average_score
+
+
+    def add(self, drill_results):
+        """
+        Fold one more session into the bucket.
+
+        Means are weighted by session count, which matches the stored
+        aggregate as long as sessions record their average split and score.
+        """
+        count = self.session_count
+        self.session_count += 1
+        self.shots_fired += drill_results.shots_fired
+        self.fastest_split_time = _min(self.fastest_split_time, drill_results.fastest_split_time)
+        self.slowest_split_time = _max(self.slowest_split_time, drill_results.slowest_split_time)
+        self.average_split_time = _mean(self.average_split_time, count, drill_results.average_split_time)
+        self.min_score = _min(self.min_score, drill_results.score)
+        self.max_score = _max(self.max_score, drill_results.score)
+        self.average_score = _mean(self.average_score, count, drill_results.score)
@@ -0,0 +1,60 @@
+from array import array
+
+class SplitTimes:
+    """
+    Shot times of a single string in integer microseconds since the start signal.
+
+    Besides the cumulative times it keeps the shot-to-shot deltas (the first
+    delta being the draw time) and running statistics for both, so adding a
+    shot and reading any statistic are O(1).
+    """
+
+    def __init__(self, times=()):
+        self.clear()
+        for split_us in times:
+            self.append(split_us)
+
+    def clear(self):
+        self.times = array('q')
+        self.deltas = array('q')
+        self._total = 0
+        self.fastest = None
+        self.slowest = None
+        self.fastest_delta = None
+        self.slowest_delta = None
+
+    def append(self, split_us):
+        """Add the next shot and return its delta to the previous shot."""
+        delta = split_us - self.times[-1] if self.times else split_us
+        self.times.append(split_us)
+        self.deltas.append(delta)
+        self._total += split_us
+
+        if self.fastest is None or split_us < self.fastest:
+            self.fastest = split_us
+        if self.slowest is None or split_us > self.slowest:
+            self.slowest = split_us
+        if self.fastest_delta is None or delta < self.fastest_delta:
+            self.fastest_delta = delta
+        if self.slowest_delta is None or delta > self.slowest_delta:
+            self.slowest_delta = delta
+        return delta
+
+    @property
+    def average(self):
+        """Mean of the cumulative shot times, or None if no shot was recorded."""
+        return self._total / len(self.times) if self.times else None
+
+    @property
+    def average_delta(self):
+        """Mean time between shots, including the draw, or None if no shot was recorded."""
+        return self.times[-1] / len(self.times) if self.times else None
+
+    def __len__(self):
+        return len(self.times)
+
+    def __iter__(self):
+        return iter(self.times)
+
+    def __getitem__(self, index):
+        return self.times[index]
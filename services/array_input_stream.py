@@ -0,0 +1,109 @@
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+from scipy.io import wavfile
+
+class ArrayInputStream:
+    """
+    Stand-in for sounddevice.InputStream that feeds audio from a numpy array.
+
+    Blocks are delivered to the callback on a background thread with the same
+    (indata, frames, time, status) signature used by sounddevice, so anything
+    built on an InputStream callback can be exercised without a microphone.
+    Stream times are on the time.monotonic() clock.
+    """
+
+    def __init__(self, data, samplerate=44100, blocksize=256, channels=1, dtype='float32', callback=None, realtime=True, **kwargs):
+        """
+        :param data: Audio samples, either 1-D (mono) or shaped (frames, channels).
+        :param samplerate: Sample rate reported to the callback.
+        :param blocksize: Number of frames delivered per callback.
+        :param channels: Number of channels delivered per callback.
+        :param dtype: Sample type delivered to the callback.
+        :param callback: Callable invoked as callback(indata, frames, time, status).
+        :param realtime: Pace the blocks at the sample rate when True, otherwise deliver them as fast as possible.
+        """
+        data = np.asarray(data, dtype=dtype)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+        self._data = np.repeat(data[:, :1], channels, axis=1) if data.shape[1] < channels else data[:, :channels]
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.channels = channels
+        self.dtype = dtype
+        self.callback = callback
+        self.realtime = realtime
+        self._position = 0
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._start_clock = None
+
+    @classmethod
+    def from_wav(cls, file_path, **kwargs):
+        """Create a stream that plays back the samples of a WAV file, scaled to [-1, 1]."""
+        samplerate, data = wavfile.read(file_path)
+        if np.issubdtype(data.dtype, np.integer):
+            data = data.astype(np.float32) / np.iinfo(data.dtype).max
+        kwargs.setdefault('samplerate', samplerate)
+        return cls(data, **kwargs)
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def time(self):
+        """Current stream time in seconds, on the same clock as the callback time stamps."""
+        if self._start_clock is None or self.realtime:
+            return time.monotonic()
+        return self._start_clock + self._position / self.samplerate
+
+    def start(self):
+        if self.active:
+            return
+        self._stop_event.clear()
+        self._start_clock = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def close(self):
+        self.stop()
+
+    def wait(self, timeout=None):
+        """Block until every sample has been delivered or the stream is stopped."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        total = len(self._data)
+        while self._position < total and not self._stop_event.is_set():
+            start = self._position
+            block = self._data[start:start + self.blocksize]
+            frames = len(block)
+            if frames < self.blocksize:
+                # Pad the final block so callers always see full-sized buffers
+                block = np.concatenate([block, np.zeros((self.blocksize - frames, self.channels), dtype=self.dtype)])
+            adc_time = self._start_clock + start / self.samplerate
+            if self.realtime:
+                # Wait until the block would have been captured by a real device
+                delay = (self._start_clock + (start + self.blocksize) / self.samplerate) - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            time_info = SimpleNamespace(inputBufferAdcTime=adc_time, currentTime=self.time, outputBufferDacTime=0.0)
+            self._position = start + self.blocksize
+            if self.callback is not None:
+                self.callback(block, self.blocksize, time_info, None)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
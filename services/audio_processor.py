@@ -1,6 +1,7 @@
 import numpy as np
-from scipy.signal import butter, lfilter, stft
-from scipy.fft import fft
+from services.filter_bank import bandpass_filter
+from scipy.fft import rfft
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 
 class AudioProcessor:
@@ -31,42 +32,88 @@ class AudioProcessor:
 
     def bandpass_filter(self, data, lowcut, highcut, fs, order=5):
         """Apply a bandpass filter to the data."""
-        nyq = 0.5 * fs
-        low = lowcut / nyq
-        high = highcut / nyq
-
-        if low >= high or low <= 0 or high >= 1:
-            raise ValueError("Cutoff frequencies must be in the range (0, 0.5) and low < high")
-
-        b, a = butter(order, [low, high], btype='band')
-        y = lfilter(b, a, data)
-        return y
+        return bandpass_filter(data, lowcut, highcut, fs, order)
     
     def detect_gunshot(self, audio_data):
-        """Detect potential gunshots in the audio data."""
+        """
+        Detect potential gunshots in the audio data.
+
+        Samples above the threshold are grouped into bursts wherever they are
+        more than a short gap apart, and each burst reports its loudest sample.
+        Bursts are then kept with the same minimum-distance rule as a
+        sample-by-sample scan: a shot starts at the first burst more than the
+        minimum distance after the previous shot's start.
+        """
         # Calculate energy of the audio
         energy = np.abs(audio_data) ** 2
-        
+        if energy.size == 0:
+            return np.array([], dtype=np.int64)
+
         # Use a higher threshold based on visual inspection
-        threshold = np.percentile(energy, 99.8)
-        
+        threshold = self.partitioned_percentile(energy, 99.8)
+
         # Detect peaks above the threshold
-        peaks = np.where(energy > threshold)[0]
-        
-        # Filter peaks to avoid multiple detections for the same shot
-        filtered_peaks = []
+        peaks = np.flatnonzero(energy > threshold)
+        if peaks.size == 0:
+            return peaks
+
+        # Split the peaks into bursts, one per report or echo
+        burst_gap = int(self.sample_rate * 0.01)  # 10ms of silence ends a burst
+        burst_starts = np.concatenate(([0], np.flatnonzero(np.diff(peaks) > burst_gap) + 1))
+        burst_ids = np.repeat(np.arange(burst_starts.size), np.diff(np.append(burst_starts, peaks.size)))
+
+        # Keep the loudest sample of each burst; np.unique returns the first one on ties
+        peak_energy = energy[peaks]
+        burst_max = np.maximum.reduceat(peak_energy, burst_starts)
+        is_max = peak_energy == burst_max[burst_ids]
+        _, first_max = np.unique(burst_ids[is_max], return_index=True)
+        burst_peaks = peaks[is_max][first_max]
+
+        # Filter bursts to avoid multiple detections for the same shot
         min_distance = int(self.sample_rate * 0.2)  # 200ms between shots
-        last_peak = -min_distance
-        
-        for peak in peaks:
-            if peak - last_peak > min_distance:
-                filtered_peaks.append(peak)
-                last_peak = peak
-        
-        return np.array(filtered_peaks)
-
-    def analyze_audio(self, audio_data, noise_profile):
-        """Analyze the audio and filter out gunshots based on calibration."""
+        return burst_peaks[self.chain_from_first(peaks[burst_starts], min_distance)]
+
+    @staticmethod
+    def chain_from_first(onsets, min_distance):
+        """
+        Indices of the sorted onsets kept by a greedy scan that starts at the
+        first one and then jumps to the first onset more than min_distance
+        after the last kept one.
+
+        Each onset's jump target is found with one searchsorted, and the chain
+        is collected by pointer doubling in log2(len(onsets)) array steps.
+        """
+        count = onsets.size
+        # Jump targets, with count as a sentinel that maps to itself
+        jump = np.append(np.searchsorted(onsets, onsets + min_distance, side='right'), count)
+        chain = np.zeros(1, dtype=np.intp)
+        while jump[0] < count:
+            # chain holds the first 2**k links and jump skips 2**k links, so this doubles the chain
+            chain = np.union1d(chain, jump[chain])
+            jump = jump[jump]
+        return chain[chain < count]
+
+    @staticmethod
+    def partitioned_percentile(values, q):
+        """
+        Compute np.percentile(values, q) with linear interpolation using a
+        partial partition instead of a full sort.
+        """
+        position = (values.size - 1) * q / 100.0
+        lower = int(np.floor(position))
+        upper = min(lower + 1, values.size - 1)
+        partitioned = np.partition(values, (lower, upper))
+        fraction = position - lower
+        return partitioned[lower] + (partitioned[upper] - partitioned[lower]) * fraction
+
+    def analyze_audio(self, audio_data, noise_profile, batch_size=1024):
+        """
+        Analyze the audio and filter out gunshots based on calibration.
+
+        All windows are taken as one strided view of the audio, the energy gate is
+        evaluated in a single reduction and only the windows that pass it are
+        transformed, in batches of batch_size windows per rfft call.
+        """
         window_size = int(0.02 * self.sample_rate)  # 20ms window
         stride = int(0.01 * self.sample_rate)  # 10ms stride
         mean_noise = noise_profile['mean']
@@ -75,30 +122,38 @@ class AudioProcessor:
         # Set thresholds based on observed gunshot energy levels
         min_energy_threshold = 0.08  # Slightly below the lowest observed gunshot energy
         max_energy_threshold = 0.12  # Slightly above the highest observed gunshot energy
-        
-        detected_shots = []
 
-        for i in range(0, len(audio_data) - window_size, stride):
-            window = audio_data[i:i + window_size]
+        audio_data = np.asarray(audio_data)
+        if len(audio_data) <= window_size:
+            print("Detected 0 gunshots after refinement.")
+            return np.array([], dtype=np.int64)
 
-            # Calculate energy
-            energy = np.mean(np.abs(window)**2)
+        # Window i starts at i * stride, matching range(0, len(audio_data) - window_size, stride)
+        windows = sliding_window_view(audio_data, window_size)[:len(audio_data) - window_size:stride]
+        starts = np.arange(0, len(audio_data) - window_size, stride)
+
+        # Mean power of every window in one pass over the view, without copying it
+        energies = np.einsum('ij,ij->i', windows, windows) / window_size
+
+        # Only consider windows whose energy is within the expected range for gunshots
+        gated = np.flatnonzero((energies >= min_energy_threshold) & (energies <= max_energy_threshold))
+
+        detected_shots = []
+        for batch_start in range(0, len(gated), batch_size):
+            batch = gated[batch_start:batch_start + batch_size]
 
-            # Only consider the window if its energy is within the expected range for gunshots
-            if min_energy_threshold <= energy <= max_energy_threshold:
-                # Frequency analysis using FFT
-                spectrum = np.abs(fft(window))[:window_size // 2]
-                spectrum_energy = np.sum(spectrum[800:3000])  # Focus on gunshot range
+            # Frequency analysis using FFT; the first window_size // 2 bins of the
+            # real FFT match the positive half of the full complex FFT
+            spectrum = np.abs(rfft(windows[batch], axis=1))[:, :window_size // 2]
+            spectrum_energy = np.sum(spectrum[:, 800:3000], axis=1)  # Focus on gunshot range
 
-                # Combine energy and spectral information
-                combined_score = (energy - min_energy_threshold) + (spectrum_energy - mean_noise)
-                
-                # Adjust dynamic threshold based on combined score
-                if combined_score > 0:
-                    detected_shots.append(i)
+            # Combine energy and spectral information
+            combined_score = (energies[batch] - min_energy_threshold) + (spectrum_energy - mean_noise)
+            detected_shots.append(starts[batch[combined_score > 0]])
 
+        detected_shots = np.concatenate(detected_shots) if detected_shots else np.array([], dtype=np.int64)
         print(f"Detected {len(detected_shots)} gunshots after refinement.")
-        return np.array(detected_shots)
+        return detected_shots
 
 
     
@@ -0,0 +1,159 @@
+import logging
+import math
+import os
+import threading
+import time
+import numpy as np
+import sounddevice as sd
+from scipy.io import wavfile
+from scipy.signal import resample_poly
+from PyQt6.QtCore import QObject, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+class BeepPlayer(QObject):
+    """
+    Plays pre-decoded beeps through a low-latency output stream at scheduled times.
+
+    Beeps are scheduled against the output stream clock and mixed into the
+    callback buffer at the exact sample of their deadline, so the start signal
+    does not depend on media pipeline or event loop latency.
+    """
+    beepEmitted = pyqtSignal(str, float)
+
+    def __init__(self, sounds_dir, sample_rate=44100, block_size=256, stream_factory=None, parent=None):
+        """
+        :param sounds_dir: Directory with the WAV files; each is available under its file name without extension.
+        :param sample_rate: Output sample rate; sounds are resampled to it when loaded.
+        :param block_size: Frames per output callback.
+        :param stream_factory: Callable creating the output stream, defaults to sounddevice.OutputStream.
+        """
+        super().__init__(parent)
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.stream_factory = stream_factory or sd.OutputStream
+        self._sounds = self.load_sounds(sounds_dir, sample_rate)
+        self._stream = None
+        self._scheduled = []
+        self._timers = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load_sounds(sounds_dir, sample_rate):
+        """Decode every WAV file in sounds_dir into a mono float32 buffer at sample_rate."""
+        sounds = {}
+        for file_name in sorted(os.listdir(sounds_dir)):
+            name, extension = os.path.splitext(file_name)
+            if extension.lower() != '.wav':
+                continue
+            file_rate, data = wavfile.read(os.path.join(sounds_dir, file_name))
+            if np.issubdtype(data.dtype, np.integer):
+                data = data.astype(np.float32) / np.iinfo(data.dtype).max
+            if data.ndim > 1:
+                data = data.mean(axis=1)
+            if file_rate != sample_rate:
+                divisor = math.gcd(file_rate, sample_rate)
+                data = resample_poly(data, sample_rate // divisor, file_rate // divisor)
+            sounds[name] = np.ascontiguousarray(data, dtype=np.float32)
+        return sounds
+
+    @property
+    def running(self):
+        return self._stream is not None
+
+    def start(self):
+        """Open the output stream. Without an output device beeps are still reported on time, just silently."""
+        if self._stream is not None:
+            return
+        try:
+            self._stream = self.stream_factory(
+                samplerate=self.sample_rate,
+                blocksize=self.block_size,
+                channels=1,
+                dtype='float32',
+                latency='low',
+                callback=self._callback
+            )
+            self._stream.start()
+        except Exception as e:
+            print(f"Unable to open the audio output stream: {e}")
+            self._stream = None
+
+    def stop(self):
+        """Cancel pending beeps and close the output stream."""
+        self.cancel()
+        if self._stream is None:
+            return
+        stream = self._stream
+        self._stream = None
+        stream.stop()
+        stream.close()
+
+    def now(self):
+        """Current time on the clock used for deadlines, in seconds."""
+        if self._stream is not None:
+            return self._stream.time
+        return time.monotonic()
+
+    def schedule(self, name, deadline):
+        """
+        Play a sound when the output clock reaches deadline.
+
+        :param name: Name of the sound, i.e. its file name without extension.
+        :param deadline: Time on the now() clock at which the sound should reach the speaker.
+        """
+        if name not in self._sounds:
+            raise KeyError(f"Unknown sound: {name}")
+        if self._stream is None:
+            timer = threading.Timer(max(0.0, deadline - time.monotonic()), self._emit_silently, (name, deadline))
+            timer.daemon = True
+            with self._lock:
+                self._timers.append(timer)
+            timer.start()
+            return
+        with self._lock:
+            self._scheduled.append([name, deadline, self._sounds[name], 0])
+
+    def cancel(self):
+        """Drop every beep that has not finished playing."""
+        with self._lock:
+            self._scheduled = []
+            timers, self._timers = self._timers, []
+        for timer in timers:
+            timer.cancel()
+
+    def _emit_silently(self, name, deadline):
+        self._report(name, deadline, time.monotonic())
+
+    def _report(self, name, deadline, emitted):
+        logger.debug("Beep %s emitted at %.6f, %.2f ms after its deadline", name, emitted, (emitted - deadline) * 1000)
+        self.beepEmitted.emit(name, emitted)
+
+    def _callback(self, outdata, frames, time_info, status):
+        # Runs on the audio thread, mixing every due sound into this buffer
+        if status:
+            print(f"Audio output status: {status}")
+        outdata.fill(0)
+        dac_time = time_info.outputBufferDacTime or time_info.currentTime
+        emitted = []
+        with self._lock:
+            remaining = []
+            for entry in self._scheduled:
+                name, deadline, buffer, position = entry
+                offset = 0
+                if position == 0:
+                    offset = round((deadline - dac_time) * self.sample_rate)
+                    if offset >= frames:
+                        remaining.append(entry)
+                        continue
+                    # A late deadline plays at the start of this buffer
+                    offset = max(offset, 0)
+                    emitted.append((name, deadline, dac_time + offset / self.sample_rate))
+                chunk = buffer[position:position + frames - offset]
+                outdata[offset:offset + len(chunk), 0] += chunk
+                entry[3] = position + len(chunk)
+                if entry[3] < len(buffer):
+                    remaining.append(entry)
+            self._scheduled = remaining
+        for name, deadline, emission_time in emitted:
+            self._report(name, deadline, emission_time)
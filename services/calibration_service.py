@@ -1,4 +1,4 @@
-from scipy.signal import butter, lfilter
+from services.filter_bank import bandpass_filter
 import sounddevice as sd
 import numpy as np
 import json
@@ -64,16 +64,7 @@ class CalibrationService:
 
     def bandpass_filter(self, data, lowcut, highcut, fs, order=5):
         """Apply a bandpass filter to the data."""
-        nyq = 0.5 * fs
-        low = lowcut / nyq
-        high = highcut / nyq
-
-        if low >= high or low <= 0 or high >= 1:
-            raise ValueError("Cutoff frequencies must be in the range (0, 0.5) and low < high")
-
-        b, a = butter(order, [low, high], btype='band')
-        y = lfilter(b, a, data)
-        return y
+        return bandpass_filter(data, lowcut, highcut, fs, order)
 
 
     def save_filtered_audio(self, file_path):
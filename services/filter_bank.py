@@ -0,0 +1,42 @@
+from functools import lru_cache
+import numpy as np
+from scipy.signal import butter, sosfilt
+
+@lru_cache(maxsize=32)
+def design_bandpass(lowcut, highcut, fs, order=5):
+    """
+    Design a Butterworth bandpass filter as float32 second-order sections.
+
+    Designs are memoized by (lowcut, highcut, fs, order), so every caller shares
+    the same coefficients and must not modify them.
+    """
+    nyq = 0.5 * fs
+    low = lowcut / nyq
+    high = highcut / nyq
+
+    if low >= high or low <= 0 or high >= 1:
+        raise ValueError("Cutoff frequencies must be in the range (0, 0.5) and low < high")
+
+    sos = butter(order, [low, high], btype='band', output='sos').astype(np.float32)
+    return sos
+
+def bandpass_filter(data, lowcut, highcut, fs, order=5):
+    """Apply a bandpass filter to a complete buffer, returning float32 samples."""
+    sos = design_bandpass(lowcut, highcut, fs, order)
+    return sosfilt(sos, np.asarray(data, dtype=np.float32))
+
+class BandpassFilter:
+    """Bandpass filter for block-wise processing that carries its state between blocks."""
+
+    def __init__(self, lowcut, highcut, fs, order=5):
+        self.sos = design_bandpass(lowcut, highcut, fs, order)
+        self.reset()
+
+    def reset(self):
+        """Clear the filter state, e.g. before the start of a new stream."""
+        self._zi = np.zeros((self.sos.shape[0], 2), dtype=np.float32)
+
+    def process(self, block):
+        """Filter a block that directly follows the previous one."""
+        filtered, self._zi = sosfilt(self.sos, np.asarray(block, dtype=np.float32), zi=self._zi)
+        return filtered
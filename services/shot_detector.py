@@ -0,0 +1,165 @@
+import threading
+import numpy as np
+import sounddevice as sd
+from services.filter_bank import BandpassFilter
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class StreamingShotDetector:
+    """Incremental gunshot detector that consumes audio one block at a time."""
+
+    def __init__(self, calibration_data, sample_rate=44100, lowcut=300, highcut=3000, threshold_sigma=8.0, min_amplitude=0.05, min_distance=0.2):
+        """
+        :param calibration_data: CalibrationData providing the noise profile.
+        :param sample_rate: Sample rate of the incoming blocks.
+        :param lowcut: Low cutoff of the bandpass filter in Hz.
+        :param highcut: High cutoff of the bandpass filter in Hz.
+        :param threshold_sigma: Number of noise standard deviations a sample must exceed to count as a shot.
+        :param min_amplitude: Lower bound for the detection threshold, used when the noise floor is very quiet or uncalibrated.
+        :param min_distance: Minimum time in seconds between two shots.
+        """
+        self.calibration_data = calibration_data
+        self.sample_rate = sample_rate
+        self.threshold_sigma = threshold_sigma
+        self.min_amplitude = min_amplitude
+        self.min_distance = int(sample_rate * min_distance)
+
+        self._filter = BandpassFilter(lowcut, highcut, sample_rate)
+        self.threshold = self._compute_threshold()
+        self.reset()
+
+    def _compute_threshold(self):
+        noise_profile = self.calibration_data.get_noise_profile() if self.calibration_data else None
+        if not noise_profile:
+            return self.min_amplitude
+        threshold = abs(noise_profile['mean']) + self.threshold_sigma * noise_profile['std']
+        return max(threshold, self.min_amplitude)
+
+    def reset(self):
+        """Forget the filter state and shot history, e.g. before a new string."""
+        self._filter.reset()
+        self._frames_processed = 0
+        self._last_shot = -self.min_distance - 1
+
+    @property
+    def frames_processed(self):
+        return self._frames_processed
+
+    def process_block(self, block):
+        """
+        Filter a block of samples and return the stream frame indices of any new shots.
+
+        :param block: 1-D array of samples that directly follows the previous block.
+        :return: List of absolute frame indices (since the last reset) where a shot starts.
+        """
+        filtered = self._filter.process(block)
+        base = self._frames_processed
+        self._frames_processed += len(block)
+
+        candidates = np.flatnonzero(np.abs(filtered) > self.threshold)
+        if candidates.size == 0:
+            return []
+
+        candidates += base
+        shots = []
+        # Blocks are normally much shorter than min_distance, so this runs at most once or twice
+        position = np.searchsorted(candidates, self._last_shot + self.min_distance + 1)
+        while position < candidates.size:
+            shot = int(candidates[position])
+            shots.append(shot)
+            self._last_shot = shot
+            position = np.searchsorted(candidates, shot + self.min_distance + 1)
+        return shots
+
+class ShotDetector(QObject):
+    """
+    Runs a StreamingShotDetector on live input and emits a signal per detected shot.
+
+    Shots are reported in integer microseconds relative to the start mark, derived
+    from the frame index of the onset so their resolution is one sample period.
+    """
+    shotDetected = pyqtSignal('qint64')
+
+    def __init__(self, calibration_data, sample_rate=44100, block_size=256, stream_factory=None, parent=None):
+        """
+        :param calibration_data: CalibrationData providing the noise profile.
+        :param sample_rate: Sample rate to capture at.
+        :param block_size: Frames per callback; 256 frames is roughly 6 ms at 44.1 kHz.
+        :param stream_factory: Callable creating the input stream, defaults to sounddevice.InputStream.
+            Pass a partial of ArrayInputStream to run the detector from recorded audio.
+        """
+        super().__init__(parent)
+        self.detector = StreamingShotDetector(calibration_data, sample_rate)
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.stream_factory = stream_factory or sd.InputStream
+        self._stream = None
+        self._lock = threading.Lock()
+        self._start_time = None
+        self._start_frame = None
+
+    @property
+    def running(self):
+        return self._stream is not None
+
+    def start(self):
+        """Open the input stream and start detecting shots from a clean state."""
+        if self._stream is not None:
+            return
+        with self._lock:
+            self.detector.reset()
+            self._start_time = None
+            self._start_frame = None
+        try:
+            self._stream = self.stream_factory(
+                samplerate=self.sample_rate,
+                blocksize=self.block_size,
+                channels=1,
+                dtype='float32',
+                latency='low',
+                callback=self._callback
+            )
+            self._stream.start()
+        except Exception as e:
+            print(f"Unable to open the audio input stream: {e}")
+            self._stream = None
+
+    def mark_start(self, stream_time=None):
+        """
+        Set time zero for shot timestamps, e.g. the moment the start beep sounded.
+
+        :param stream_time: Time on the stream clock (seconds); defaults to the current stream time.
+        """
+        if self._stream is None:
+            return
+        if stream_time is None:
+            stream_time = self._stream.time
+        with self._lock:
+            self._start_time = stream_time
+            self._start_frame = None
+
+    def stop(self):
+        """Stop and close the input stream."""
+        if self._stream is None:
+            return
+        stream = self._stream
+        self._stream = None
+        stream.stop()
+        stream.close()
+
+    def _callback(self, indata, frames, time_info, status):
+        # Runs on the audio thread; the signal is delivered to the GUI thread as a queued call
+        if status:
+            print(f"Audio input status: {status}")
+        with self._lock:
+            block_start = self.detector.frames_processed
+            shots = self.detector.process_block(indata[:, 0])
+            if self._start_time is not None and self._start_frame is None:
+                # Some host APIs do not report capture times; fall back to the current time
+                adc_time = time_info.inputBufferAdcTime or (time_info.currentTime - frames / self.sample_rate)
+                self._start_frame = block_start + round((self._start_time - adc_time) * self.sample_rate)
+            start_frame = self._start_frame
+        if start_frame is None:
+            return
+        for shot in shots:
+            if shot >= start_frame:
+                self.shotDetected.emit((shot - start_frame) * 1000000 // self.sample_rate)
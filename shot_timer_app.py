@@ -5,11 +5,19 @@ from PyQt6.QtQml import QQmlApplicationEngine
 from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal
 from dal.db_manager import DatabaseManager
 from dal.drill_results_repository import DrillResultsRepository
+from dal.persistence_worker import PersistenceWorker
+from dal.query_worker import QueryWorker
+from dal.result_cache import ResultCache
+from dal.results_event_bus import ResultsEventBus
 from models.drill_model import DrillModel, DrillModelList
 from main_menu_actions.calibration_dialog import CalibrationDialog
+from models.calibration_data import CalibrationData
+from services.shot_detector import ShotDetector
+from services.beep_player import BeepPlayer
+from utils.plot_renderer import PlotRenderer
 from view_model.timer_screen_view_model import TimerScreenViewModel
 from view_model.view_history_screen_view_model import ViewHistoryScreenViewModel
-from view_model.view_analytics_screen_view_model import ViewAnalyticsScreenViewModel
+from view_model.view_analytics_screen_view_model import ViewAnalyticsScreenViewModel, QT_CHARTS_AVAILABLE
 
 
 class ShotTimerApp:
@@ -17,6 +25,11 @@ class ShotTimerApp:
         # Initialize database manager
         self.db_manager = DatabaseManager()
         self.drills_model = None
+        self.shot_detector = None
+        self.beep_player = None
+        self.persistence_worker = None
+        self.query_worker = None
+        self.plot_renderer = None
 
     def start(self):
         # Load drills using the static method from DrillModel
@@ -34,10 +47,28 @@ class ShotTimerApp:
         engine = QQmlApplicationEngine()
         self.calibrate_dialog = CalibrationDialog(engine)
         self.view_model = ShotTimerAppViewModel()
-        drillResultsRepo = DrillResultsRepository(self.db_manager)
-        self.timer_screen_view_model = TimerScreenViewModel(drills, drillResultsRepo)
-        self.view_history_screen_view_model = ViewHistoryScreenViewModel(drills, drillResultsRepo)
-        self.view_analytics_screen_view_model = ViewAnalyticsScreenViewModel(drills, drillResultsRepo)
+        # One cache for every connection, so background writes invalidate the screens' reads
+        result_cache = ResultCache()
+        # Tells the screens about saved, edited and deleted results so they update in place
+        results_event_bus = ResultsEventBus()
+        drillResultsRepo = DrillResultsRepository(self.db_manager, result_cache, results_event_bus)
+        self.shot_detector = ShotDetector(CalibrationData.load_calibration_data())
+        # Decode the beeps and open the output stream up front so the start signal plays without delay
+        self.beep_player = BeepPlayer(os.path.join(os.path.dirname(__file__), 'sounds'))
+        self.beep_player.start()
+        # Save results on a background thread so a slow commit never stalls the UI
+        self.persistence_worker = PersistenceWorker(self.db_manager.db_name, result_cache, results_event_bus)
+        self.persistence_worker.start()
+        # Run the history and analytics queries off the UI thread
+        self.query_worker = QueryWorker(self.db_manager.db_name, result_cache)
+        self.query_worker.start()
+        chart_backend = 'qtcharts' if QT_CHARTS_AVAILABLE else 'matplotlib'
+        if chart_backend == 'matplotlib':
+            # Render matplotlib plots in a separate process, cached on disk by content
+            self.plot_renderer = PlotRenderer(os.path.join(os.path.dirname(self.db_manager.db_name) or '.', 'plot_cache'))
+        self.timer_screen_view_model = TimerScreenViewModel(drills, drillResultsRepo, self.beep_player, self.shot_detector, self.persistence_worker)
+        self.view_history_screen_view_model = ViewHistoryScreenViewModel(drills, drillResultsRepo, self.query_worker, results_event_bus)
+        self.view_analytics_screen_view_model = ViewAnalyticsScreenViewModel(drills, drillResultsRepo, self.query_worker, results_event_bus, chart_backend, self.plot_renderer)
 
         # Expose the drills model to QML
         context = engine.rootContext()
@@ -54,11 +85,27 @@ class ShotTimerApp:
 
         if not engine.rootObjects():
             sys.exit(-1)
+        self.timer_screen_view_model.setWindow(engine.rootObjects()[0])
 
         # Execute the application
         sys.exit(app.exec())
 
     def close(self):
+        # Release the microphone if a string was still running
+        if self.shot_detector is not None:
+            self.shot_detector.stop()
+        if self.beep_player is not None:
+            self.beep_player.stop()
+
+        if self.query_worker is not None:
+            self.query_worker.stop()
+        if self.plot_renderer is not None:
+            self.plot_renderer.shutdown()
+
+        # Write any results still waiting in the background queue
+        if self.persistence_worker is not None:
+            self.persistence_worker.stop()
+
         # Close the database connection
         self.db_manager.close()
 
@@ -0,0 +1,70 @@
+import os
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt6.QtCore import QUrl
+from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtQuick import QQuickView
+from dal.db_manager import DatabaseManager
+from dal.drill_results_repository import DrillResultsRepository
+from models.drill_model import DrillModel
+from models.drill_results import DrillResults
+from view_model.view_history_screen_view_model import DrillResultsModel, DrillResultsRoles, ViewHistoryScreenViewModel
+
+VIEW = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'views', 'view_history_screen.qml')
+
+@pytest.fixture(scope='module')
+def app():
+    return QGuiApplication.instance() or QGuiApplication([])
+
+@pytest.fixture
+def repository(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / 'history.db'))
+    db_manager.connect()
+    yield DrillResultsRepository(db_manager)
+    db_manager.close()
+
+def no_shots(end_time):
+    return DrillResults('Drill A', end_time - 1000, end_time, 1000, 0, [], score=None, notes=None)
+
+def legacy(end_time):
+    # Older versions stored the text "N/A" when a string had no shots
+    return DrillResults('Drill A', end_time - 1000, end_time, 1000, 0, [], 0.0, 'N/A', 'N/A', id=99)
+
+def test_missing_split_times_are_none(app):
+    model = DrillResultsModel([no_shots(2000), legacy(1000)])
+    for row in range(2):
+        index = model.index(row)
+        assert model.data(index, DrillResultsRoles.FASTEST_SPLIT_TIME) is None
+        assert model.data(index, DrillResultsRoles.SLOWEST_SPLIT_TIME) is None
+        assert model.data(index, DrillResultsRoles.SPLITS) == []
+
+def rendered_texts(item):
+    # Delegates are only visual children of the list, so walk childItems() rather than QObject children
+    if not item.isVisible():
+        return []
+    texts = [item.property('text')] if isinstance(item.property('text'), str) else []
+    for child in item.childItems():
+        texts += rendered_texts(child)
+    return texts
+
+def test_delegates_show_na_for_missing_values(app, repository):
+    # Read back from the database, so missing split times arrive as NULL
+    repository.upsert(no_shots(2000))
+    view_model = ViewHistoryScreenViewModel([DrillModel('Drill A', '', 0, 3, 5)], repository)
+    view_model.selectedIndex = 0
+    view_model.results.insertResults(0, [legacy(1000)])
+
+    view = QQuickView()
+    view.rootContext().setContextProperty('viewHistoryScreenViewModel', view_model)
+    view.setSource(QUrl.fromLocalFile(VIEW))
+    view.resize(800, 1200)
+    view.show()
+    app.processEvents()
+
+    texts = rendered_texts(view.rootObject())
+    for label in ('Fastest Split Time', 'Slowest Split Time', 'Score', 'Notes'):
+        shown = [text for text in texts if text.startswith(label + ':')]
+        assert shown and all(text == label + ': N/A' for text in shown), shown
+    assert not any('undefined' in text for text in texts)
@@ -14,11 +14,13 @@ class LineGraphPlotter:
         self.data = data_json
         self.config = config_json
 
-    def plot(self, output_file):
+    def plot(self, output_file, figure=None):
         """
         Plot the data and save it as an SVG file.
 
         :param output_file: The path where the SVG file will be saved.
+        :param figure: Optional figure to clear and draw into instead of creating (and closing) a new
+            one, so repeated plots in a long-running process reuse the same canvas.
         """
         # Calculate the width based on the number of data points
         max_points = max(len(content['points']) for content in self.data.values())
@@ -26,7 +28,12 @@ class LineGraphPlotter:
         width = max_points * width_per_point
         height = 5  # You can adjust the height as needed
 
-        plt.figure(figsize=(width, height))
+        if figure is None:
+            plt.figure(figsize=(width, height))
+        else:
+            figure.clf()
+            figure.set_size_inches(width, height)
+            plt.figure(figure.number)  # Make it the current figure for the calls below
 
         # Handle datetime formatting
         is_datetime = False
@@ -91,4 +98,5 @@ class LineGraphPlotter:
 
         # Save the plot as an SVG file
         plt.savefig(output_file, format='svg', bbox_inches='tight')
-        plt.close()
+        if figure is None:
+            plt.close()
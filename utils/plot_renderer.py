@@ -0,0 +1,118 @@
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Figure reused by every render in the worker process
+_figure = None
+
+def _init_render_process():
+    # Headless backend; must be chosen before pyplot is imported in the worker
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _render_plot(data_json, config, output_file):
+    """Runs in the worker process: draw into the persistent figure and move the SVG into place."""
+    global _figure
+    import matplotlib.pyplot as plt
+    from utils.line_graph_plotter import LineGraphPlotter
+    if _figure is None:
+        _figure = plt.figure()
+    # Write under a unique name and rename, so readers never see a half-written file
+    temporary_file = f"{output_file}.{os.getpid()}.tmp"
+    LineGraphPlotter(data_json, config).plot(temporary_file, figure=_figure)
+    os.replace(temporary_file, output_file)
+    return output_file
+
+def plot_cache_key(drill_name, window, data_json, config):
+    """
+    Content address of a plot: a hash of the drill, the time window, the plotted data and the config.
+
+    The data itself stands in for a data version here, because version counters
+    start over with every run of the app while the cached files stay on disk.
+    """
+    payload = json.dumps([drill_name, list(window), data_json, config], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class PlotRenderer(QObject):
+    """
+    Renders LineGraphPlotter SVGs in a background process, with an on-disk cache.
+
+    Each plot is stored as <cache_dir>/<key>.svg, where the key is
+    plot_cache_key(). A plot that was rendered before is returned right away;
+    otherwise it is rendered by a single worker process holding one persistent
+    Agg figure, and plotRendered(key, path) is emitted on the UI thread when
+    the file is ready.
+    """
+    plotRendered = pyqtSignal(str, str)
+
+    def __init__(self, cache_dir, max_cached_plots=200, parent=None):
+        """
+        :param cache_dir: Directory holding the rendered plots; created if missing.
+        :param max_cached_plots: Oldest plots beyond this number are deleted after each render.
+        """
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.max_cached_plots = max_cached_plots
+        os.makedirs(cache_dir, exist_ok=True)
+        self._executor = self._new_executor()
+
+    @staticmethod
+    def _new_executor():
+        # Spawned rather than forked so the worker starts without the Qt and audio state of the app
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_render_process
+        )
+
+    def render(self, drill_name, window, data_json, config):
+        """
+        Return (key, path) of the plot; path is None while it is still being rendered.
+
+        :param window: (start, end) of the plotted time span in epoch milliseconds.
+        """
+        key = plot_cache_key(drill_name, window, data_json, config)
+        path = os.path.join(self.cache_dir, f"{key}.svg")
+        if os.path.exists(path):
+            os.utime(path)  # Keep recently viewed plots from being pruned
+            return key, path
+        try:
+            future = self._executor.submit(_render_plot, data_json, config, path)
+        except BrokenProcessPool:
+            # The worker died (e.g. killed for memory); start a fresh one
+            self._executor.shutdown(wait=False)
+            self._executor = self._new_executor()
+            future = self._executor.submit(_render_plot, data_json, config, path)
+        future.add_done_callback(lambda future: self._on_rendered(key, future))
+        return key, None
+
+    def _on_rendered(self, key, future):
+        # Runs on an executor thread; the signal is queued to the receivers' thread
+        if future.cancelled():
+            return
+        try:
+            path = future.result()
+        except Exception as e:
+            print(f"An error occurred while rendering a plot: {e}")
+            return
+        self._prune()
+        self.plotRendered.emit(key, path)
+
+    def _prune(self):
+        try:
+            plots = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.svg')]
+            if len(plots) <= self.max_cached_plots:
+                return
+            plots.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in plots[:len(plots) - self.max_cached_plots]:
+                os.remove(entry.path)
+        except OSError as e:
+            print(f"An error occurred while pruning the plot cache: {e}")
+
+    def shutdown(self):
+        """Stop the worker process, dropping renders that have not started."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,4 +1,5 @@
 from PyQt6.QtCore import QObject
+from PyQt6.QtGui import QGuiApplication
 
 def find_child_by_type_and_id(parent: QObject, child_type: type, child_id: str) -> QObject:
     """
@@ -20,3 +21,20 @@ def find_child_by_type_and_id(parent: QObject, child_type: type, child_id: str)
             return result
 
     return None
+
+def display_refresh_interval(max_fps=None, default_fps=60.0) -> int:
+    """
+    Return the timer interval in milliseconds that matches the primary screen's refresh rate.
+
+    :param max_fps: Optional cap on the refresh rate, e.g. to save CPU on slow devices.
+    :param default_fps: Refresh rate to assume when no screen is available.
+    :return: Interval in whole milliseconds, at least 1.
+    """
+    app = QGuiApplication.instance()
+    screen = app.primaryScreen() if app is not None else None
+    fps = screen.refreshRate() if screen is not None else 0
+    if fps <= 0:
+        fps = default_fps
+    if max_fps:
+        fps = min(fps, max_fps)
+    return max(1, round(1000 / fps))
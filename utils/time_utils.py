@@ -21,3 +21,28 @@ def milliseconds_to_datetime(ms, format_string='%Y-%m-%d %I:%M %p'):
     formatted_date = result_date.strftime(format_string)
     
     return formatted_date
+
+# Zero-padded fields for "mm:ss.zzz", built once so formatting is a few lookups
+_TWO_DIGITS = tuple(f"{value:02d}" for value in range(100))
+_THREE_DIGITS = tuple(f"{value:03d}" for value in range(1000))
+
+def format_elapsed_time(ms):
+    """
+    Format a duration given in integer milliseconds as "mm:ss.zzz".
+
+    :param ms: Number of milliseconds.
+    :return: Formatted elapsed time string.
+    """
+    minutes, remainder = divmod(ms, 60000)
+    seconds, milliseconds = divmod(remainder, 1000)
+    minutes_text = _TWO_DIGITS[minutes] if minutes < 100 else str(minutes)
+    return f"{minutes_text}:{_TWO_DIGITS[seconds]}.{_THREE_DIGITS[milliseconds]}"
+
+def format_split_time(us):
+    """
+    Format a split given in integer microseconds as "mm:ss.zzz".
+
+    :param us: Number of microseconds since the start signal.
+    :return: Formatted split time string.
+    """
+    return format_elapsed_time(us // 1000)
@@ -1,11 +1,11 @@
-from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, QTimer, pyqtSlot
-from PyQt6.QtCore import QTime, QElapsedTimer
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PyQt6.QtCore import QUrl
-from enum import IntEnum
-import os
+from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, QTimer, pyqtSlot, QAbstractListModel, QModelIndex, Qt
+from PyQt6.QtCore import QElapsedTimer
+from enum import IntEnum, auto
 import time
 from models.drill_results import DrillResults
+from models.split_times import SplitTimes
+from utils.time_utils import format_elapsed_time, format_split_time
+from utils.qt_utils import display_refresh_interval
 
 class TimerRunState(IntEnum):
     STARTED = 0
@@ -14,50 +14,119 @@ class TimerRunState(IntEnum):
     STOPPED = 3
     COUNTDOWN = 4
 
+class SplitsRoles(IntEnum):
+    # Custom roles start after UserRole so they never collide with Qt's own roles
+    SPLIT = Qt.ItemDataRole.UserRole.value + 1
+    DELTA = auto()
+
+_split_role_names = {
+    SplitsRoles.SPLIT: b'split',
+    SplitsRoles.DELTA: b'delta',
+}
+
+class SplitsModel(QAbstractListModel):
+    """Formatted splits of the running string; each new shot only inserts one row."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._splits = []
+        self._deltas = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self._splits)
+
+    def roleNames(self):
+        return _split_role_names
+
+    def data(self, index, role=SplitsRoles.SPLIT):
+        row = index.row()
+        if row < 0 or row >= len(self._splits):
+            return None
+        if role == SplitsRoles.SPLIT:
+            return self._splits[row]
+        if role == SplitsRoles.DELTA:
+            return self._deltas[row]
+        return None
+
+    def appendSplit(self, split, delta):
+        row = len(self._splits)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._splits.append(split)
+        self._deltas.append(delta)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._splits = []
+        self._deltas = []
+        self.endResetModel()
+
+# Delay before the first countdown beep, leaving the audio callback time to pick it up
+COUNTDOWN_LEAD_TIME = 0.1
+COUNTDOWN_BEEP = 'beep_2'
+GO_BEEP = 'go_beep'
+
 class TimerScreenViewModel(QObject):
     timerStateChanged = pyqtSignal(int)
     shotsFiredChanged = pyqtSignal(int)
     elapsedTimeChanged = pyqtSignal(str)
-    splitsChanged = pyqtSignal(list)
     countdownChanged = pyqtSignal(int)
     wasStartedChanged = pyqtSignal(bool)
+    savedResultIdChanged = pyqtSignal(int)
+    saveFailed = pyqtSignal(str)
 
-    def __init__(self, drills, drillResultsRepo, parent=None):
+    def __init__(self, drills, drillResultsRepo, beepPlayer, shotDetector=None, persistenceWorker=None, maxDisplayFps=None, parent=None):
         super().__init__(parent)
         self._drills = drills
         self._drill = None
         self._selectedIndex = -1
-        self._elapsedTime = QTime(0, 0, 0)
+        self._elapsedTime = format_elapsed_time(0)
         self._shotsFired = 0
         self._timerRunningState = TimerRunState.STOPPED
-        self._splits = []
+        self._splits = SplitTimes()
+        self._splits_model = SplitsModel()
         self._countdownTime = 0
         self.drill_results_repository = drillResultsRepo
-
+        self._shot_detector = shotDetector
+        if self._shot_detector is not None:
+            self._shot_detector.shotDetected.connect(self.onShotDetected)
+        self._persistence_worker = persistenceWorker
+        if self._persistence_worker is not None:
+            self._persistence_worker.resultSaved.connect(self.onResultSaved)
+            self._persistence_worker.saveFailed.connect(self.onSaveFailed)
+        self._saved_result_id = -1
+
+        # Repaint the running clock on the window's frames once setWindow() is called;
+        # until then, or when capped with maxDisplayFps, a QTimer at the screen's refresh rate approximates them
+        self._maxDisplayFps = maxDisplayFps
         self._timer = QTimer()
-        self._timer.setInterval(10)
         self._timer.timeout.connect(self.updateTime)
+        self._window = None
+        self._frameDriven = False
 
-        self._soundPlayer = QMediaPlayer()
-        self._audioOutput = QAudioOutput()
-        self._soundPlayer.setAudioOutput(self._audioOutput)
-        self._audioOutput.setVolume(100.0)
-        beep_file = os.path.abspath('./sounds/beep_2.wav')
-        self._soundPlayer.setSource(QUrl.fromLocalFile(beep_file))
+        self._beep_player = beepPlayer
+        self._beep_player.beepEmitted.connect(self.onBeepEmitted)
+        self._countdown_beeps = 0
 
         self._elapsedTimer = QElapsedTimer()
 
-        self._soundPlayer.mediaStatusChanged.connect(self.onMediaStatusChanged)
         self._start_time = 0
         self._end_time = 0
         self._was_started = False
 
-    def onMediaStatusChanged(self, status):
-        if status == QMediaPlayer.MediaStatus.EndOfMedia:
-            if self._countdownTime < 1:
-                self._startTimerNow()
-            else:
-                self.updateCountdown()  # Trigger countdown when media ends
+    @pyqtSlot(str, float)
+    def onBeepEmitted(self, name, emitted):
+        if self._timerRunningState != TimerRunState.COUNTDOWN:
+            return
+        if name == GO_BEEP:
+            self._countdownTime = 0
+            self.countdownChanged.emit(self._countdownTime)
+            # The emission time is on the audio clock, which the shot detector shares
+            self._startTimerAt(emitted if self._beep_player.running else None)
+        elif name == COUNTDOWN_BEEP:
+            self._countdownTime = self._drill._timerCountDown - self._countdown_beeps
+            self._countdown_beeps += 1
+            self.countdownChanged.emit(self._countdownTime)
 
     @pyqtProperty(int, notify=timerStateChanged)
     def timerState(self):
@@ -94,20 +163,24 @@ class TimerScreenViewModel(QObject):
 
     @pyqtProperty(str, notify=elapsedTimeChanged)
     def elapsedTime(self):
-        return self._elapsedTime.toString("mm:ss.zzz")
+        return self._elapsedTime
 
     @pyqtProperty(int, notify=shotsFiredChanged)
     def shotsFired(self):
         return self._shotsFired
 
-    @pyqtProperty(list, notify=splitsChanged)
+    @pyqtProperty(SplitsModel, constant=True)
     def splits(self):
-        return self._splits
+        return self._splits_model
 
     @pyqtProperty(int, notify=countdownChanged)
     def countdownTime(self):
         return self._countdownTime
 
+    @pyqtProperty(int, notify=savedResultIdChanged)
+    def savedResultId(self):
+        return self._saved_result_id
+
     @pyqtProperty(bool, notify=wasStartedChanged)
     def wasStarted(self):
         return self._was_started
@@ -119,33 +192,52 @@ class TimerScreenViewModel(QObject):
                 self._countdownTime = self._drill._timerCountDown
                 self._timerRunningState = TimerRunState.COUNTDOWN
                 self.timerStateChanged.emit(TimerRunState.COUNTDOWN)
-                self._soundPlayer.play()  # Play the first beep
+                if self._shot_detector is not None:
+                    self._shot_detector.start()  # Open the microphone before the start signal
+                self.scheduleCountdown()
                 self.countdownChanged.emit(self._countdownTime)
             else:
                 self._startTimerNow()
 
+    def scheduleCountdown(self):
+        """Schedule one beep per second of countdown followed by the go beep, against the audio clock."""
+        self._beep_player.cancel()
+        self._countdown_beeps = 0
+        first_beep = self._beep_player.now() + COUNTDOWN_LEAD_TIME
+        for second in range(self._countdownTime):
+            self._beep_player.schedule(COUNTDOWN_BEEP, first_beep + second)
+        self._beep_player.schedule(GO_BEEP, first_beep + self._countdownTime)
+
     @pyqtSlot()
     def _startTimerNow(self):
+        self._startTimerAt(None)
+
+    def _startTimerAt(self, stream_time):
+        """Start the string with stream_time (audio clock seconds, or None for now) as time zero."""
         self._was_started = True
         self.wasStartedChanged.emit(self._was_started)
         self._start_time = round(time.time() * 1000)
         self._elapsedTimer.start()
-        self._timer.start()
-        self._splits = []
+        self._startDisplay()
+        self._splits.clear()
+        self._splits_model.clear()
+        if self._shot_detector is not None:
+            self._shot_detector.start()
+            self._shot_detector.mark_start(stream_time)
         self._timerRunningState = TimerRunState.STARTED
         self.timerStateChanged.emit(TimerRunState.STARTED)
 
     @pyqtSlot()
     def pauseTimer(self):
         if self._timerRunningState in [TimerRunState.RUNNING, TimerRunState.STARTED]:
-            self._timer.stop()
+            self._stopDisplay()
             self._timerRunningState = TimerRunState.PAUSED
             self.timerStateChanged.emit(TimerRunState.PAUSED)
 
     @pyqtSlot()
     def resumeTimer(self):
         if self._timerRunningState == TimerRunState.PAUSED:
-            self._timer.start()
+            self._startDisplay()
             self._timerRunningState = TimerRunState.RUNNING
             self.timerStateChanged.emit(TimerRunState.RUNNING)
 
@@ -153,87 +245,80 @@ class TimerScreenViewModel(QObject):
     def stopTimer(self):
         if self._timerRunningState != TimerRunState.STOPPED:
             self._end_time = round(time.time() * 1000)
-            self._timer.stop()
-            self._elapsedTime = QTime(0, 0, 0).addMSecs(self._elapsedTimer.elapsed())
-            self.elapsedTimeChanged.emit(self._elapsedTime.toString("mm:ss.zzz"))
+            self._stopDisplay()
+            self._beep_player.cancel()
+            if self._shot_detector is not None:
+                self._shot_detector.stop()
+            self._elapsedTime = format_elapsed_time(self._elapsedTimer.elapsed())
+            self.elapsedTimeChanged.emit(self._elapsedTime)
             self._timerRunningState = TimerRunState.STOPPED
             self.timerStateChanged.emit(TimerRunState.STOPPED)
             self._countdownTime = self._drill._timerCountDown
 
+    def setWindow(self, window):
+        """Drive the running clock from the frames of window (a QQuickWindow) instead of the fallback QTimer."""
+        if self._window is not None:
+            self._window.frameSwapped.disconnect(self._onFrameSwapped)
+        self._window = window
+        if window is not None:
+            window.frameSwapped.connect(self._onFrameSwapped)
+
+    def _startDisplay(self):
+        # A capped rate needs the timer, as following the window would render every frame anyway
+        if self._window is not None and not self._maxDisplayFps:
+            self._frameDriven = True
+            self._window.update()
+        else:
+            self._timer.setInterval(display_refresh_interval(self._maxDisplayFps))
+            self._timer.start()
+
+    def _stopDisplay(self):
+        self._frameDriven = False
+        self._timer.stop()
+
+    @pyqtSlot()
+    def _onFrameSwapped(self):
+        if self._frameDriven:
+            self.updateTime()
+            # Keep frames coming while running, even when the text did not change
+            self._window.update()
+
     @pyqtSlot()
     def updateTime(self):
         if self._timerRunningState in [TimerRunState.RUNNING, TimerRunState.STARTED]:
-            self._elapsedTime = QTime(0, 0, 0).addMSecs(self._elapsedTimer.elapsed())
-            self.elapsedTimeChanged.emit(self._elapsedTime.toString("mm:ss.zzz"))
+            elapsed_time = format_elapsed_time(self._elapsedTimer.elapsed())
+            if elapsed_time != self._elapsedTime:
+                self._elapsedTime = elapsed_time
+                self.elapsedTimeChanged.emit(elapsed_time)
 
-    @pyqtSlot()
-    def updateCountdown(self):
-        if self._timerRunningState != TimerRunState.COUNTDOWN:
-            return
-        if self._countdownTime > 0:
-            self._countdownTime -= 1
-            self.countdownChanged.emit(self._countdownTime)
-            if self._countdownTime > 0:
-                self._soundPlayer.play()  # Play the next beep sound
-            else:
-                beep_file = os.path.abspath('./sounds/go_beep.wav')
-                self._soundPlayer.setSource(QUrl.fromLocalFile(beep_file))
-                self._soundPlayer.play()  # Play the next beep sound
-        else:
-            beep_file = os.path.abspath('./sounds/go_beep.wav')
-            self._soundPlayer.setSource(QUrl.fromLocalFile(beep_file))
-            self._soundPlayer.play()  # Play the next beep sound
+    @pyqtSlot('qint64')
+    def onShotDetected(self, split_us):
+        if self._timerRunningState in [TimerRunState.RUNNING, TimerRunState.STARTED]:
+            self.addShotAt(split_us)
 
     @pyqtSlot()
     def addShotFired(self):
+        # Manual entry has no audio onset, so fall back to the elapsed timer
+        self.addShotAt(self._elapsedTimer.nsecsElapsed() // 1000)
+
+    def addShotAt(self, split_us):
+        """Record a shot that happened split_us microseconds after the start signal."""
         self._shotsFired += 1
         self.shotsFiredChanged.emit(self._shotsFired)
 
-        split_time = self._elapsedTime.toString("mm:ss.zzz")
-        self._splits.append(split_time)
-        self.splitsChanged.emit(self._splits)
+        delta_us = self._splits.append(split_us)
+        self._splits_model.appendSplit(format_split_time(split_us), format_split_time(delta_us))
 
+    # Splits are kept in microseconds, the results columns hold milliseconds
     def calculate_average_split_time(self):
-        if not self._splits:
-            return 0.0
-
-        total_split_time = 0.0
-        for split in self._splits:
-            time_parts = split.split(":")
-            minutes = int(time_parts[0])
-            seconds, milliseconds = map(int, time_parts[1].split("."))
-            total_split_time += (minutes * 60 * 1000) + (seconds * 1000) + milliseconds
-
-        average_split_time = total_split_time / len(self._splits)
-        return average_split_time
+        average = self._splits.average
+        return average / 1000 if average is not None else 0.0
 
     def calculate_fastest_split_time(self):
-        if not self._splits:
-            return "N/A"
-
-        fastest_split_time = float('inf')
-        for split in self._splits:
-            time_parts = split.split(":")
-            minutes = int(time_parts[0])
-            seconds, milliseconds = map(int, time_parts[1].split("."))
-            split_time = (minutes * 60 * 1000) + (seconds * 1000) + milliseconds
-            if split_time < fastest_split_time:
-                fastest_split_time = split_time
-        return fastest_split_time
+        return self._splits.fastest / 1000 if self._splits.fastest is not None else None
 
     def calculate_slowest_split_time(self):
-        if not self._splits:
-            return "N/A"
-
-        slowest_split_time = float('-inf')
-        for split in self._splits:
-            time_parts = split.split(":")
-            minutes = int(time_parts[0])
-            seconds, milliseconds = map(int, time_parts[1].split("."))
-            split_time = (minutes * 60 * 1000) + (seconds * 1000) + milliseconds
-            if split_time > slowest_split_time:
-                slowest_split_time = split_time
-        return slowest_split_time
+        return self._splits.slowest / 1000 if self._splits.slowest is not None else None
 
     @pyqtSlot(float, str)
     def saveResults(self, score, notes):
@@ -244,12 +329,26 @@ class TimerScreenViewModel(QObject):
                 end_time=self._end_time,  # You may need to calculate end time
                 elapsed_time=self._elapsedTimer.elapsed(),
                 shots_fired=self._shotsFired,
-                splits=self._splits,
+                splits=list(self._splits),
                 average_split_time=self.calculate_average_split_time(),  # Implement these methods
                 fastest_split_time=self.calculate_fastest_split_time(),
                 slowest_split_time=self.calculate_slowest_split_time(),
                 score=score,
                 notes=notes
             )
-            print(drill_results.to_json())
-            self.drill_results_repository.upsert(drill_results)
+            if self._persistence_worker is not None:
+                # Written in the background; onResultSaved reports the new id
+                self._persistence_worker.save(drill_results)
+            else:
+                self.drill_results_repository.upsert(drill_results)
+                self.onResultSaved(drill_results)
+
+    @pyqtSlot(object)
+    def onResultSaved(self, drill_results):
+        self._saved_result_id = drill_results.id
+        self.savedResultIdChanged.emit(self._saved_result_id)
+
+    @pyqtSlot(object, str)
+    def onSaveFailed(self, drill_results, message):
+        # Forwarded so the screen can tell the shooter the string was not saved
+        self.saveFailed.emit(message)
@@ -1,28 +1,76 @@
-from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, pyqtSlot, QUrl
+from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, pyqtSlot, QUrl, QPointF, QDateTime
 from datetime import datetime, timedelta
+import os
+import tempfile
 from utils.line_graph_plotter import LineGraphPlotter
 from utils.time_utils import milliseconds_to_datetime
-import random
+from dal.result_aggregates import bucket_start
+from models.drill_results_aggregate import DrillResultsAggregate
+
+try:
+    # Importing QtCharts lets the series handed over from QML be used as QLineSeries
+    from PyQt6 import QtCharts  # noqa: F401
+    QT_CHARTS_AVAILABLE = True
+except ImportError:
+    QT_CHARTS_AVAILABLE = False
+
+CHART_BACKENDS = ('qtcharts', 'matplotlib')
+
+# Chart series: (label, aggregate attribute, matplotlib color)
+_SERIES = (
+    ('Fastest', 'fastest_split_time', 'blue'),
+    ('Slowest', 'slowest_split_time', 'red'),
+    ('Average', 'average_split_time', 'green'),
+)
 
 class ViewAnalyticsScreenViewModel(QObject):
     dataChanged = pyqtSignal()
     drillNameChanged = pyqtSignal()
     timeSpanChanged = pyqtSignal()
     nextButtonEnabledChanged = pyqtSignal()
+    loadingChanged = pyqtSignal()
 
-    def __init__(self, drills, drillResultsRepo, parent=None):
+    def __init__(self, drills, drillResultsRepo, queryWorker=None, resultsEventBus=None, chartBackend=None, plotRenderer=None, parent=None):
+        """
+        :param chartBackend: 'qtcharts' to draw into a QML ChartView, 'matplotlib' to render an SVG
+            file shown as an image; by default QtCharts is used when PyQt6-Charts is installed.
+        :param plotRenderer: PlotRenderer for the matplotlib backend; without one plots are rendered
+            on the calling thread.
+        """
         super().__init__(parent)
+        if chartBackend is None:
+            chartBackend = 'qtcharts' if QT_CHARTS_AVAILABLE else 'matplotlib'
+        if chartBackend not in CHART_BACKENDS:
+            raise ValueError(f"chartBackend must be one of {CHART_BACKENDS}")
+        if chartBackend == 'qtcharts' and not QT_CHARTS_AVAILABLE:
+            print("PyQt6-Charts is not installed, drawing analytics with matplotlib instead")
+            chartBackend = 'matplotlib'
+        self._chart_backend = chartBackend
+        self._chart = None
+        self.plot_renderer = plotRenderer
+        # Without a renderer plots are drawn into the temp directory rather than the working directory
+        self._plot_path = os.path.join(tempfile.gettempdir(), 'shot_timer_split_times.svg')
+        self._pending_plot_key = None
+        if plotRenderer is not None:
+            plotRenderer.plotRendered.connect(self.onPlotRendered)
         self._drills = drills
         self._drill = None
         self._selectedIndex = -1
         self.drill_results_repository = drillResultsRepo
-        self._drillResults = []
+        self.query_worker = queryWorker
+        self._loading = False
+        self._aggregates = []
         self._end_date = datetime.now()
         self._start_date = self._end_date - timedelta(weeks=1)
+        if resultsEventBus is not None:
+            resultsEventBus.resultsInserted.connect(self.onResultsInserted)
+            resultsEventBus.resultsUpdated.connect(self.onResultsUpdated)
+            resultsEventBus.resultsDeleted.connect(self.onResultsDeleted)
+            resultsEventBus.resultsReset.connect(self.onResultsReset)
 
     @pyqtProperty(bool, notify=dataChanged)
     def hasDrills(self):
-        return len(self._drillResults) > 0
+        return len(self._aggregates) > 0
 
     @pyqtProperty(str, notify=drillNameChanged)
     def drillName(self):
@@ -36,9 +84,22 @@ class ViewAnalyticsScreenViewModel(QObject):
     def nextButtonEnabled(self):
         return self._end_date < datetime.now()
 
+    @pyqtProperty(bool, notify=loadingChanged)
+    def loading(self):
+        return self._loading
+
+    def _setLoading(self, loading):
+        if self._loading != loading:
+            self._loading = loading
+            self.loadingChanged.emit()
+
+    @pyqtProperty(bool, constant=True)
+    def nativeChart(self):
+        return self._chart_backend == 'qtcharts'
+
     @pyqtProperty(str, notify=dataChanged)
     def plotUrl(self):
-        return QUrl.fromLocalFile('split_times.svg').toString()
+        return QUrl.fromLocalFile(self._plot_path).toString()
 
     @pyqtProperty(int)
     def selectedIndex(self):
@@ -49,37 +110,124 @@ class ViewAnalyticsScreenViewModel(QObject):
         if self._selectedIndex != value:
             self._selectedIndex = value
             self._drill = self._drills[value]
-            self._fetchDrillResults()
-            self.create_plot_widget()
-            self.dataChanged.emit()
             self.drillNameChanged.emit()
+            self._fetchDrillResults()
+
+    def _window(self):
+        return (round(self._start_date.timestamp() * 1000), round(self._end_date.timestamp() * 1000))
 
     def _fetchDrillResults(self):
         if self._drill:
-            start = round(self._start_date.timestamp() * 1000)
-            end = round(self._end_date.timestamp() * 1000)
-            self._drillResults = self.drill_results_repository.get_results_for_drill_name(self._drill._name, between=(start, end))
+            start, end = self._window()
+            self._setLoading(True)
+            # One row per day instead of one per session, so wider spans stay cheap.
+            # A newer request (another drill or week) supersedes one still running.
+            if self.query_worker is not None:
+                self.query_worker.submit('analytics', self._onAggregatesLoaded, 'get_aggregates', self._drill._name, 'day', (start, end))
+            else:
+                self._onAggregatesLoaded(self.drill_results_repository.get_aggregates(self._drill._name, 'day', between=(start, end)))
+
+    def _onAggregatesLoaded(self, aggregates):
+        self._aggregates = aggregates or []
+        self.create_plot_widget()
+        self.dataChanged.emit()
+        self._setLoading(False)
     
+    @pyqtSlot(list)
+    def onResultsInserted(self, results):
+        """Fold new sessions of the selected drill into the daily series instead of querying again."""
+        if not self._drill:
+            return
+        if self._loading:
+            # The running query may have read the table before these were committed
+            self._fetchDrillResults()
+            return
+        start, end = self._window()
+        first_day = bucket_start(start, 'day')
+        changed = False
+        for result in results:
+            day = bucket_start(result.end_time, 'day')
+            if result.drill_name != self._drill._name or not first_day <= day <= end:
+                continue
+            aggregate = next((aggregate for aggregate in self._aggregates if aggregate.bucket_start == day), None)
+            if aggregate is None:
+                aggregate = DrillResultsAggregate(result.drill_name, 'day', day, 0, 0)
+                self._aggregates.append(aggregate)
+                self._aggregates.sort(key=lambda aggregate: aggregate.bucket_start)
+            aggregate.add(result)
+            changed = True
+        if changed:
+            self.create_plot_widget()
+            self.dataChanged.emit()
+
+    @pyqtSlot(list)
+    def onResultsUpdated(self, changes):
+        # Fastest/slowest cannot be taken back out of a bucket, so re-read the window's few daily rows
+        if self._drill and any(self._drill._name in (old.drill_name, new.drill_name) for old, new in changes):
+            self._fetchDrillResults()
+
+    @pyqtSlot(list)
+    def onResultsDeleted(self, results):
+        if self._drill and any(result.drill_name == self._drill._name for result in results):
+            self._fetchDrillResults()
+
+    @pyqtSlot()
+    def onResultsReset(self):
+        self._fetchDrillResults()
+
+    @pyqtSlot(QObject, QObject, QObject, QObject, QObject)
+    def attachChart(self, fastestSeries, slowestSeries, averageSeries, axisX, axisY):
+        """Called by the ChartView once it is created; the series are then updated in place."""
+        self._chart = ((fastestSeries, slowestSeries, averageSeries), axisX, axisY)
+        self._updateChart()
+
+    @pyqtSlot()
+    def detachChart(self):
+        self._chart = None
+
+    def _series(self):
+        """Points of each chart series as (epoch ms, seconds), skipping days without split statistics."""
+        series = {}
+        for label, attribute, _ in _SERIES:
+            points = []
+            for aggregate in self._aggregates:
+                value = getattr(aggregate, attribute)
+                if value is not None:
+                    points.append((aggregate.bucket_start, value / 1000))
+            series[label] = points
+        return series
+
     @pyqtSlot()
     def create_plot_widget(self):
-        if len(self._drillResults) == 0:
+        if self._chart_backend == 'qtcharts':
+            self._updateChart()
+        else:
+            self._renderPlotFile()
+
+    def _updateChart(self):
+        if self._chart is None:
+            return
+        line_series, axis_x, axis_y = self._chart
+        max_y = 0.0
+        # replace() swaps in each whole series at once, with a single repaint
+        for line, points in zip(line_series, self._series().values()):
+            line.replace([QPointF(x, y) for x, y in points])
+            max_y = max([max_y] + [y for _, y in points])
+        start, end = self._window()
+        axis_x.setMin(QDateTime.fromMSecsSinceEpoch(bucket_start(start, 'day')))
+        axis_x.setMax(QDateTime.fromMSecsSinceEpoch(end))
+        axis_y.setRange(0, max_y * 1.1 if max_y > 0 else 1)
+
+    def _renderPlotFile(self):
+        if len(self._aggregates) == 0:
             return
         data_json = {}
-        fastest_splits = []
-        slowest_splits = []
-        average_splits = []
         tmformat = '%m/%d/%Y %H:%M'
-        count = 0
-        for result in self._drillResults:
-            minusDays = 86400000 * count
-            random_noise = abs(random.randint(0, 1) * 0.09)
-            fastest_splits.append({'x': milliseconds_to_datetime(result.end_time - minusDays, tmformat), 'y': result.fastest_split_time + random_noise})
-            slowest_splits.append({'x': milliseconds_to_datetime(result.end_time - minusDays, tmformat), 'y': result.slowest_split_time + random_noise})
-            average_splits.append({'x': milliseconds_to_datetime(result.end_time - minusDays, tmformat), 'y': result.average_split_time + random_noise})
-            count += 1
-        data_json['Fastest'] = {'points': fastest_splits, 'color': 'blue'}
-        data_json['Slowest'] = {'points': slowest_splits, 'color': 'red'}
-        data_json['Average'] = {'points': average_splits, 'color': 'green'}
+        for (label, _, color), points in zip(_SERIES, self._series().values()):
+            data_json[label] = {
+                'points': [{'x': milliseconds_to_datetime(x, tmformat), 'y': y} for x, y in points],
+                'color': color
+            }
         config = {
             'x_label': 'Date', 
             'y_label': 'Time (s)', 
@@ -95,25 +243,41 @@ class ViewAnalyticsScreenViewModel(QObject):
             "grid_line_width": 0.7,
             "x_label_format": "datetime",
         }
-        plotter = LineGraphPlotter(data_json, config)
-        plotter.plot('split_times.svg')
+        if self.plot_renderer is None:
+            plotter = LineGraphPlotter(data_json, config)
+            plotter.plot(self._plot_path)
+            return
+        # Whole days, so revisiting a week (even in a later run) maps to the same cached file
+        start, end = self._window()
+        days = (bucket_start(start, 'day'), bucket_start(end, 'day'))
+        key, path = self.plot_renderer.render(self._drill._name, days, data_json, config)
+        if path is not None:
+            # Rendered before, e.g. when coming back to a week
+            self._pending_plot_key = None
+            self._plot_path = path
+        else:
+            self._pending_plot_key = key
+
+    @pyqtSlot(str, str)
+    def onPlotRendered(self, key, path):
+        # Ignore renders for a drill or week the user has already left
+        if key == self._pending_plot_key:
+            self._pending_plot_key = None
+            self._plot_path = path
+            self.dataChanged.emit()
 
     @pyqtSlot()
     def previousWeek(self):
         self._start_date -= timedelta(weeks=1)
         self._end_date -= timedelta(weeks=1)
-        self._fetchDrillResults()
-        self.create_plot_widget()
-        self.dataChanged.emit()
         self.timeSpanChanged.emit()
         self.nextButtonEnabledChanged.emit()
+        self._fetchDrillResults()
 
     @pyqtSlot()
     def nextWeek(self):
         self._start_date += timedelta(weeks=1)
         self._end_date += timedelta(weeks=1)
-        self._fetchDrillResults()
-        self.create_plot_widget()
-        self.dataChanged.emit()
         self.timeSpanChanged.emit()
         self.nextButtonEnabledChanged.emit()
+        self._fetchDrillResults()
@@ -1,11 +1,16 @@
 from PyQt6.QtCore import QObject, pyqtProperty, pyqtSignal, QAbstractListModel, QModelIndex, Qt, pyqtSlot
+from collections import OrderedDict
 from enum import IntEnum, auto
-from utils.time_utils import milliseconds_to_datetime
+from functools import lru_cache
+import html
+from utils.time_utils import milliseconds_to_datetime, format_split_time
+from dal.split_codec import pack_splits, unpack_splits
 
 
 
 class DrillResultsRoles(IntEnum):
-    DRILL_NAME = auto()
+    # Custom roles start after UserRole so they never collide with Qt's own roles
+    DRILL_NAME = Qt.ItemDataRole.UserRole.value + 1
     START_TIME = auto()
     END_TIME = auto()
     ELAPSED_TIME = auto()
@@ -16,6 +21,7 @@ class DrillResultsRoles(IntEnum):
     SLOWEST_SPLIT_TIME = auto()
     SCORE = auto()
     NOTES = auto()
+    MATCH = auto()
 
 _role_names = {
     DrillResultsRoles.DRILL_NAME: b'drill_name',
@@ -29,69 +35,215 @@ _role_names = {
     DrillResultsRoles.SLOWEST_SPLIT_TIME: b'slowest_split_time',
     DrillResultsRoles.SCORE: b'score',
     DrillResultsRoles.NOTES: b'notes',
+    DrillResultsRoles.MATCH: b'match',
 }
 
+# Marks matched words in search snippets; control characters cannot appear in
+# typed notes, so the snippet can be HTML-escaped before they become tags
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+_roles = frozenset(DrillResultsRoles)
+
+@lru_cache(maxsize=1024)
+def _format_minute(minute):
+    # Timestamps are shown to the minute, so start and end times of a session usually share one entry
+    return milliseconds_to_datetime(minute * 60000)
+
+def _format_timestamp(ms):
+    return _format_minute(ms // 60000)
+
+def _seconds(milliseconds):
+    return DrillResultsModel.seconds(milliseconds)
+
+def _no_format(value):
+    return value
+
+# How each role's raw column value is turned into what delegates display
+_formatters = {
+    DrillResultsRoles.DRILL_NAME: _no_format,
+    DrillResultsRoles.START_TIME: _format_timestamp,
+    DrillResultsRoles.END_TIME: _format_timestamp,
+    DrillResultsRoles.ELAPSED_TIME: lambda elapsed_time: round(elapsed_time / 1000, 2),
+    DrillResultsRoles.SHOTS_FIRED: _no_format,
+    # The column holds the packed blob, decoded only when the row is shown
+    DrillResultsRoles.SPLITS: lambda packed: [format_split_time(int(split)) for split in unpack_splits(packed)],
+    DrillResultsRoles.AVERAGE_SPLIT_TIME: _seconds,
+    DrillResultsRoles.FASTEST_SPLIT_TIME: _seconds,
+    DrillResultsRoles.SLOWEST_SPLIT_TIME: _seconds,
+    DrillResultsRoles.SCORE: _no_format,
+    DrillResultsRoles.NOTES: _no_format,
+    DrillResultsRoles.MATCH: _no_format,
+}
+
+_MISSING = object()
+
 class DrillResultsModel(QAbstractListModel):
-    def __init__(self, results: list = [], parent=None):
+    """
+    List model of drill results that grows a page at a time.
+
+    Views call fetchMore() as they scroll near the end; the model then emits
+    fetchMoreRequested for its owner to load the next page, which arrives
+    through appendResults(). Rows are kept as raw columns and a role is only
+    formatted when a delegate asks for it. Formatted values live in a small
+    LRU cache sized for the rows on screen plus a margin.
+    """
+    fetchMoreRequested = pyqtSignal()
+
+    def __init__(self, results=None, parent=None, cached_rows=64):
+        """
+        :param cached_rows: Number of rows whose formatted values are kept; a bit more than fit on screen.
+        """
         super().__init__(parent)
-        self._results = results
-        self._data = []
-        self.formatDataToFitRoles()
+        self._ids = []
+        self._columns = {role: [] for role in DrillResultsRoles}
+        self._snippets = {}
+        self._formatted = OrderedDict()
+        self._max_formatted = cached_rows * len(DrillResultsRoles)
+        self._can_fetch_more = False
+        if results:
+            self._insertColumns(0, results)
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self._results)
-
-    def formatDataToFitRoles(self):
-        for result in self._results:
-            self._data.append({
-                DrillResultsRoles.DRILL_NAME: result.drill_name,
-                DrillResultsRoles.START_TIME: milliseconds_to_datetime(result.start_time),
-                DrillResultsRoles.END_TIME: milliseconds_to_datetime(result.end_time),
-                DrillResultsRoles.ELAPSED_TIME: round(result.elapsed_time / 1000, 2),
-                DrillResultsRoles.SHOTS_FIRED: result.shots_fired,
-                DrillResultsRoles.SPLITS: result.splits,
-                DrillResultsRoles.AVERAGE_SPLIT_TIME: round(result.average_split_time / 1000, 1),
-                DrillResultsRoles.FASTEST_SPLIT_TIME: round(result.fastest_split_time / 1000,1),
-                DrillResultsRoles.SLOWEST_SPLIT_TIME: round(result.slowest_split_time/1000, 1),
-                DrillResultsRoles.SCORE: result.score,
-                DrillResultsRoles.NOTES: result.notes
-            })
+        return 0 if parent.isValid() else len(self._ids)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._can_fetch_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            # Ask once; the owner re-enables fetching when the page has arrived
+            self._can_fetch_more = False
+            self.fetchMoreRequested.emit()
+
+    def setCanFetchMore(self, can_fetch_more):
+        self._can_fetch_more = can_fetch_more
+
+    def _insertColumns(self, row, results):
+        # Formatted values are cached by row, so shifting rows invalidates them
+        if row < len(self._ids):
+            self._formatted.clear()
+        self._ids[row:row] = [result.id for result in results]
+        for role, values in self._columns.items():
+            values[row:row] = [self._rawValue(result, role) for result in results]
+
+    def _rawValue(self, result, role):
+        if role == DrillResultsRoles.SPLITS:
+            # Keep only the packed blob, not the result object, alive in the column
+            packed = result.packed_splits
+            return packed if packed is not None else pack_splits(result.splits)
+        if role == DrillResultsRoles.MATCH:
+            return self._snippets.get(result.id)
+        return getattr(result, _role_names[role].decode())
+
+    @staticmethod
+    def seconds(milliseconds):
+        """Convert a stored split time to seconds, keeping missing values (and legacy "N/A") as None."""
+        if not isinstance(milliseconds, (int, float)):
+            return None
+        return round(milliseconds / 1000, 1)
 
     def roleNames(self):
         return _role_names
 
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        if role not in list(DrillResultsRoles):
+        if role not in _roles:
             return None
 
-        try:
-            result = self._data[index.row()]
-        except IndexError:
+        row = index.row()
+        if not 0 <= row < len(self._ids):
             return None
 
-        if role in result:
-            return result[role]
-        return None
+        key = (row, role)
+        value = self._formatted.get(key, _MISSING)
+        if value is _MISSING:
+            value = _formatters[role](self._columns[role][row])
+            self._formatted[key] = value
+            if len(self._formatted) > self._max_formatted:
+                self._formatted.popitem(last=False)
+        else:
+            self._formatted.move_to_end(key)
+        return value
     
-    def setResults(self, results):
+    def setResults(self, results, snippets=None):
+        """
+        :param snippets: Optional dict of result id to a rich text search snippet, shown in the match role.
+        """
         self.beginResetModel()
-        self._results = results
-        self._data = []
-        self.formatDataToFitRoles()
+        self._ids = []
+        self._columns = {role: [] for role in DrillResultsRoles}
+        self._formatted.clear()
+        self._snippets = snippets or {}
+        self._insertColumns(0, results)
         self.endResetModel()
 
+    def appendResults(self, results):
+        """Add results after the existing rows; nothing is formatted until the rows are shown."""
+        if not results:
+            return
+        self.insertResults(len(self._ids), results)
+
+    def insertResults(self, row, results):
+        """Insert results before the given row."""
+        if not results:
+            return
+        self.beginInsertRows(QModelIndex(), row, row + len(results) - 1)
+        self._insertColumns(row, results)
+        self.endInsertRows()
+
+    def replaceResult(self, row, result):
+        """Show new values for the result at row."""
+        self._ids[row] = result.id
+        for role, values in self._columns.items():
+            values[row] = self._rawValue(result, role)
+            self._formatted.pop((row, role), None)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def removeResult(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._ids[row]
+        for values in self._columns.values():
+            del values[row]
+        self._formatted.clear()
+        self.endRemoveRows()
+
+    def rowOfId(self, drill_results_id):
+        """Return the row showing the result with this id, or -1."""
+        try:
+            return self._ids.index(drill_results_id)
+        except ValueError:
+            return -1
+
+    def rowKey(self, row):
+        """Return the (end_time, id) sort key of the result at row."""
+        return (self._columns[DrillResultsRoles.END_TIME][row], self._ids[row])
+
 class ViewHistoryScreenViewModel(QObject):
     dataChanged = pyqtSignal()
+    loadingChanged = pyqtSignal()
+    searchTextChanged = pyqtSignal()
 
-    def __init__(self, drills, drillResultsRepo, parent=None):
+    def __init__(self, drills, drillResultsRepo, queryWorker=None, resultsEventBus=None, parent=None):
         super().__init__(parent)
         self._drills = drills
         self._drill = None
         self._selectedIndex = -1
         self.drill_results_repository = drillResultsRepo
+        self.query_worker = queryWorker
+        self._loading = False
         self._results_model = DrillResultsModel()
-        self._offset = 0
+        self._results_model.fetchMoreRequested.connect(self.loadNextPage)
+        self._last_key = None
+        self._has_more = True
         self._limit = 25
+        self._search_text = ''
+        self._snippets = {}
+        if resultsEventBus is not None:
+            resultsEventBus.resultsInserted.connect(self.onResultsInserted)
+            resultsEventBus.resultsUpdated.connect(self.onResultsUpdated)
+            resultsEventBus.resultsDeleted.connect(self.onResultsDeleted)
+            resultsEventBus.resultsReset.connect(self.onResultsReset)
 
 
     @pyqtProperty(int)
@@ -103,25 +255,149 @@ class ViewHistoryScreenViewModel(QObject):
         if self._selectedIndex != value:
             self._selectedIndex = value
             self._drill = self._drills[value]
+            # Start over from the newest result of the newly selected drill,
+            # dropping a page of the previous drill that may still be loading
+            self._reload()
+
+    def _reload(self):
+        if self.query_worker is not None:
+            self.query_worker.cancel('history')
+        self._results_model.setResults([])
+        self._last_key = None
+        self._has_more = True
+        self._setLoading(False)
+        if self._search_text.strip():
+            self._runSearch()
+        else:
             self.loadNextPage()  # Load initial results for the selected drill
 
     @pyqtProperty(DrillResultsModel, notify=dataChanged)
     def results(self):
         return self._results_model
 
+    @pyqtProperty(bool, notify=loadingChanged)
+    def loading(self):
+        return self._loading
+
+    def _setLoading(self, loading):
+        # The list may ask for the next page whenever none is loading and one exists
+        self._results_model.setCanFetchMore(self._has_more and not loading)
+        if self._loading != loading:
+            self._loading = loading
+            self.loadingChanged.emit()
+
     @pyqtSlot()
     def loadNextPage(self):
-        if self._drill:
-            results = self.drill_results_repository.get_results_for_drill(self._drill, self._offset, self._limit)
-            current_results = self._results_model._results
-            self._results_model.setResults(current_results + results)
-            self._offset += self._limit
-            self.dataChanged.emit()  # Notify QML about the data update
+        if self._drill and self._has_more and not self._loading:
+            self._setLoading(True)
+            if self.query_worker is not None:
+                self.query_worker.submit('history', self._onPageLoaded, 'get_results_for_drill', self._drill, self._last_key, self._limit)
+            else:
+                self._onPageLoaded(self.drill_results_repository.get_results_for_drill(self._drill, self._last_key, self._limit))
+
+    def _onPageLoaded(self, results):
+        if results is not None:
+            if results:
+                self._last_key = self.drill_results_repository.page_key(results[-1])
+            self._has_more = len(results) == self._limit
+            self._results_model.appendResults(results)
+        self._setLoading(False)
 
     def loadMoreResults(self):
+        self.loadNextPage()
+
+    @pyqtSlot(list)
+    def onResultsInserted(self, results):
+        """Insert new results of the selected drill where they belong among the rows already loaded."""
+        if not self._drill or self._search_text.strip():
+            return
+        if self._last_key is None and (self._has_more or self._loading):
+            return  # The first page is not loaded yet and will include them
+        for result in results:
+            if result.drill_name != self._drill.name or self._results_model.rowOfId(result.id) >= 0:
+                continue
+            key = self.drill_results_repository.page_key(result)
+            if self._has_more and key < self._last_key:
+                continue  # Older than every loaded row; it will arrive with a later page
+            # Rows are sorted newest first
+            low, high = 0, self._results_model.rowCount()
+            while low < high:
+                middle = (low + high) // 2
+                if self._results_model.rowKey(middle) > key:
+                    low = middle + 1
+                else:
+                    high = middle
+            self._results_model.insertResults(low, [result])
+
+    @pyqtSlot(list)
+    def onResultsUpdated(self, changes):
+        for old, new in changes:
+            row = self._results_model.rowOfId(new.id)
+            if row < 0:
+                self.onResultsInserted([new])
+            elif self._drill is None or new.drill_name != self._drill.name:
+                self._results_model.removeResult(row)
+            elif new.end_time != old.end_time:
+                # Moves within the list
+                self._results_model.removeResult(row)
+                self.onResultsInserted([new])
+            else:
+                self._results_model.replaceResult(row, new)
+
+    @pyqtSlot(list)
+    def onResultsDeleted(self, results):
+        for result in results:
+            row = self._results_model.rowOfId(result.id)
+            if row >= 0:
+                self._results_model.removeResult(row)
+
+    @pyqtSlot()
+    def onResultsReset(self):
         if self._drill:
-            results = self.drill_results_repository.get_results_for_drill(self._drill, self._offset, self._limit)
-            current_results = self._results_model._results
-            self._results_model.setResults(current_results + results)
-            self._offset += self._limit
-            self.dataChanged.emit()  # Notify QML about the data update
\ No newline at end of file
+            self._reload()
+
+    @pyqtProperty(str, notify=searchTextChanged)
+    def searchText(self):
+        return self._search_text
+
+    @pyqtSlot(str)
+    def search(self, text):
+        """Show the results of the selected drill whose notes match text, best first; empty text shows the full history."""
+        if text != self._search_text:
+            # Whitespace alone does not change the query
+            query_changed = text.strip() != self._search_text.strip()
+            self._search_text = text
+            self.searchTextChanged.emit()
+            if query_changed:
+                self._reload()
+
+    def _runSearch(self):
+        if not self._drill:
+            return
+        # Search results come in one ranked batch, not in pages
+        self._has_more = False
+        self._setLoading(True)
+        args = (self._search_text.strip(), self._drill.name, self._limit * 2, (_MATCH_START, _MATCH_END))
+        if self.query_worker is not None:
+            self.query_worker.submit('history', self._onSearchMatched, 'search_notes', *args)
+        else:
+            self._onSearchMatched(self.drill_results_repository.search_notes(*args))
+
+    def _onSearchMatched(self, matches):
+        matches = matches or []
+        self._snippets = {drill_results_id: self.highlight(snippet) for drill_results_id, snippet in matches}
+        ids = [drill_results_id for drill_results_id, _ in matches]
+        if self.query_worker is not None:
+            self.query_worker.submit('history', self._onSearchLoaded, 'get_results_by_ids', ids)
+        else:
+            self._onSearchLoaded(self.drill_results_repository.get_results_by_ids(ids))
+
+    def _onSearchLoaded(self, results):
+        self._results_model.setResults(results or [], self._snippets)
+        self.dataChanged.emit()
+        self._setLoading(False)
+
+    @staticmethod
+    def highlight(snippet):
+        """Turn a search snippet into rich text with the matched words in bold."""
+        return html.escape(snippet or '').replace(_MATCH_START, '<b>').replace(_MATCH_END, '</b>')
@@ -0,0 +1,59 @@
+import QtQuick 2.15
+import QtCharts 2.15
+
+ChartView {
+    id: chart
+    title: "Split Times"
+    titleColor: "white"
+    backgroundColor: "#2C2C2C"
+    legend.labelColor: "white"
+    antialiasing: true
+
+    DateTimeAxis {
+        id: dateAxis
+        titleText: "Date"
+        format: "MM/dd"
+        tickCount: 8
+        labelsColor: "white"
+        gridLineColor: "#cccccc"
+    }
+
+    ValueAxis {
+        id: timeAxis
+        titleText: "Time (s)"
+        min: 0
+        labelsColor: "white"
+        gridLineColor: "#cccccc"
+    }
+
+    LineSeries {
+        id: fastestSeries
+        name: "Fastest"
+        color: "blue"
+        pointsVisible: true
+        axisX: dateAxis
+        axisY: timeAxis
+    }
+
+    LineSeries {
+        id: slowestSeries
+        name: "Slowest"
+        color: "red"
+        pointsVisible: true
+        axisX: dateAxis
+        axisY: timeAxis
+    }
+
+    LineSeries {
+        id: averageSeries
+        name: "Average"
+        color: "green"
+        pointsVisible: true
+        axisX: dateAxis
+        axisY: timeAxis
+    }
+
+    // The view model fills the series in place whenever the drill, week or results change
+    Component.onCompleted: viewAnalyticsScreenViewModel.attachChart(fastestSeries, slowestSeries, averageSeries, dateAxis, timeAxis)
+    Component.onDestruction: viewAnalyticsScreenViewModel.detachChart()
+}
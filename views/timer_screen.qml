@@ -146,7 +146,7 @@ Rectangle {
                             visible: timerScreenViewModel.wasStarted
                             clip: true
                             delegate: Text {
-                                text: "Shot #"+(index +1)+": "+ modelData
+                                text: "Shot #"+(index +1)+": "+ model.split + " (+" + model.delta + ")"
                                 font.pointSize: 18
                                 color: "white"
                             }
@@ -51,13 +51,24 @@ Rectangle {
             font.bold: true
         }
 
+        // Native chart when PyQt6-Charts is available; it lives in its own file so
+        // this screen still loads without the QtCharts QML module
+        Loader {
+            active: viewAnalyticsScreenViewModel.nativeChart
+            source: "analytics_chart.qml"
+            anchors.horizontalCenter: parent.horizontalCenter
+            width: parent.width - 40
+            height: parent.height - 100
+            visible: viewAnalyticsScreenViewModel.hasDrills
+        }
+
         Image {
-            source: viewAnalyticsScreenViewModel.plotUrl
+            source: viewAnalyticsScreenViewModel.nativeChart ? "" : viewAnalyticsScreenViewModel.plotUrl
             anchors.horizontalCenter: parent.horizontalCenter
             width: parent.width - 40
             height: parent.height - 100
             fillMode: Image.PreserveAspectFit
-            visible: viewAnalyticsScreenViewModel.hasDrills
+            visible: !viewAnalyticsScreenViewModel.nativeChart && viewAnalyticsScreenViewModel.hasDrills
         }
 
         Text {
@@ -65,7 +76,12 @@ Rectangle {
             font.pointSize: 20
             color: "white"
             font.bold: true
-            visible: !viewAnalyticsScreenViewModel.hasDrills
+            visible: !viewAnalyticsScreenViewModel.hasDrills && !viewAnalyticsScreenViewModel.loading
         }
     }
+
+    BusyIndicator {
+        anchors.centerIn: parent
+        running: viewAnalyticsScreenViewModel.loading
+    }
 }
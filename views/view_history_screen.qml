@@ -8,12 +8,24 @@ Rectangle {
 
     Column{
         anchors.fill: parent
-        Button {
-            height: 44
+        Row {
             spacing: 10
-            text: "Go Back"
-            onClicked: {
-                stackView.pop()
+
+            Button {
+                height: 44
+                text: "Go Back"
+                onClicked: {
+                    stackView.pop()
+                }
+            }
+
+            TextField {
+                id: searchField
+                height: 44
+                width: 300
+                placeholderText: "Search notes"
+                // Each keystroke supersedes the previous search still running
+                onTextEdited: viewHistoryScreenViewModel.search(text)
             }
         }
         ListView {
@@ -83,45 +95,53 @@ Rectangle {
                             width: parent.width / 2 - spacing / 2 // Adjust width for each column
 
                             Text {
-                                text: "Average Split Time: " + (model.average_split_time !== null ? model.average_split_time + " seconds" : "N/A")
+                                text: "Average Split Time: " + (model.average_split_time != null ? model.average_split_time + " seconds" : "N/A")
                                 font.pointSize: 14
                                 color: "white"
                             }
 
                             Text {
-                                text: "Fastest Split Time: " + (model.fastest_split_time !== null ? model.fastest_split_time + " seconds" : "N/A")
+                                text: "Fastest Split Time: " + (model.fastest_split_time != null ? model.fastest_split_time + " seconds" : "N/A")
                                 font.pointSize: 14
                                 color: "white"
                             }
 
                             Text {
-                                text: "Slowest Split Time: " + (model.slowest_split_time !== null ? model.slowest_split_time + " seconds" : "N/A")
+                                text: "Slowest Split Time: " + (model.slowest_split_time != null ? model.slowest_split_time + " seconds" : "N/A")
                                 font.pointSize: 14
                                 color: "white"
                             }
 
                             Text {
-                                text: "Score: " + (model.score !== null ? model.score : "N/A")
+                                text: "Score: " + (model.score != null ? model.score : "N/A")
                                 font.pointSize: 14
                                 color: "white"
                             }
 
                             Text {
-                                text: "Notes: " + (model.notes !== null ? model.notes : "N/A")
+                                text: "Notes: " + (model.notes != null ? model.notes : "N/A")
                                 font.pointSize: 14
                                 color: "white"
                                 wrapMode: Text.Wrap
                             }
+
+                            Text {
+                                text: "Match: " + model.match
+                                textFormat: Text.StyledText
+                                font.pointSize: 14
+                                color: "white"
+                                wrapMode: Text.Wrap
+                                visible: !!model.match
+                            }
                         }
                     }
                 }
             }
-
-            onMovementEnded: {
-                if (view.indexAt(0, height - 1) >= model.count - 1) {
-                    viewHistoryScreenViewModel.loadNextPage()
-                }
-            }
         }
     }
+
+    BusyIndicator {
+        anchors.centerIn: parent
+        running: viewHistoryScreenViewModel.loading
+    }
 }